@@ -0,0 +1,109 @@
+"""
+Bytes each cached user and member takes, as measured by tracemalloc.
+
+Run from the repository root with ``python -m benchmarks.cache_memory [count]``.
+"""
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from typing import Any, Callable
+
+from discord.cache import ColumnarMemberStore, Store
+from discord.member import Member
+from discord.user import User
+
+COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+ROLES = [10**17 + role for role in range(30)]
+
+
+def user(i: int) -> dict[str, Any]:
+    return {
+        'id': str(10**17 + 1000 + i),
+        'username': f'user{i}',
+        'discriminator': '0',
+        'avatar': '%032x' % random.getrandbits(128),
+        'public_flags': 0,
+        'bot': False,
+    }
+
+
+def member(i: int) -> dict[str, Any]:
+    data = {
+        'user': user(i),
+        'roles': [str(role) for role in random.sample(ROLES, random.choice((0, 0, 1, 1, 2, 3)))],
+        'joined_at': '2022-04-26T06:26:56.936000+00:00',
+        'deaf': False,
+        'mute': False,
+        'flags': 0,
+        'pending': False,
+    }
+
+    if i % 10 == 0:
+        data['nick'] = f'nick{i}'
+
+    return data
+
+
+def measure(build: Callable[[list[dict[str, Any]]], Any], raw: list[str]) -> float:
+    # decoded inside the measurement, so strings aren't shared with anything kept outside it
+    gc.collect()
+    tracemalloc.start()
+    kept = build([json.loads(payload) for payload in raw])
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size / len(raw)
+
+
+def payloads(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    return items
+
+
+def member_payloads(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # the user itself is cached with the users
+    for data in items:
+        del data['user']
+
+    return items
+
+
+def users(items: list[dict[str, Any]]) -> Store[User]:
+    store: Store[User] = Store()
+
+    for data in items:
+        store.upsert(int(data['id']), User(data, None))  # type: ignore[arg-type]
+
+    return store
+
+
+def members(factory: Callable[[], Any]) -> Callable[[list[dict[str, Any]]], Any]:
+    def build(items: list[dict[str, Any]]) -> Any:
+        store = factory()
+
+        for data in items:
+            member = Member(data)
+            store.upsert(member.user_id, member)
+
+        return store
+
+    return build
+
+
+def main() -> None:
+    random.seed(1)
+    raw_users = [json.dumps(user(i)) for i in range(COUNT)]
+    raw_members = [json.dumps(member(i)) for i in range(COUNT)]
+
+    print(f'{COUNT} of each')
+    print(f'user, payload dict: {measure(payloads, raw_users):.0f} B')
+    print(f'user, User: {measure(users, raw_users):.0f} B')
+    print(f'member, payload dict: {measure(member_payloads, raw_members):.0f} B')
+    print(f'member, Store[Member]: {measure(members(Store), raw_members):.0f} B')
+    print(f'member, ColumnarMemberStore: {measure(members(ColumnarMemberStore), raw_members):.0f} B')
+
+
+if __name__ == '__main__':
+    main()
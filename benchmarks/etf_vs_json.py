@@ -0,0 +1,74 @@
+"""
+Size and decode time of Gateway payloads as JSON and as ETF.
+
+Run from the repository root with ``python -m benchmarks.etf_vs_json [payloads]``,
+where `payloads` is a file of recorded Gateway payloads, one JSON document per line.
+Without it, a GUILD_CREATE of a 2000 member guild is made up.
+"""
+import json
+import sys
+import timeit
+from typing import Any
+
+from discord.gateway import etf
+from discord.internal import codec
+
+NUMBER = 20
+
+
+def guild_create(members: int = 2000) -> dict[str, Any]:
+    return {
+        'op': 0,
+        's': 2,
+        't': 'GUILD_CREATE',
+        'd': {
+            'id': '175928847299117063',
+            'name': 'guild',
+            'member_count': members,
+            'roles': [{'id': str(10**17 + i), 'name': f'role{i}', 'permissions': '104324673'} for i in range(30)],
+            'channels': [{'id': str(10**17 + 100 + i), 'type': 0, 'name': f'channel{i}'} for i in range(50)],
+            'members': [
+                {
+                    'user': {
+                        'id': str(10**17 + 1000 + i),
+                        'username': f'user{i}',
+                        'discriminator': '0',
+                        'avatar': None,
+                    },
+                    'roles': [str(10**17 + i % 30)],
+                    'joined_at': '2022-04-26T06:26:56.936000+00:00',
+                    'deaf': False,
+                    'mute': False,
+                }
+                for i in range(members)
+            ],
+        },
+    }
+
+
+def load(path: str | None) -> list[Any]:
+    if path is None:
+        return [guild_create()]
+
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def main() -> None:
+    payloads = load(sys.argv[1] if len(sys.argv) > 1 else None)
+    as_json = [json.dumps(payload, separators=(',', ':')).encode() for payload in payloads]
+    as_etf = [etf.dumps(payload) for payload in payloads]
+
+    print(f'{len(payloads)} payloads')
+    print(f'json: {sum(map(len, as_json)) / 1024:.0f} KiB, etf: {sum(map(len, as_etf)) / 1024:.0f} KiB')
+
+    decoders = [('json (stdlib)', json.loads, as_json), (f'json ({codec.name})', codec.loads, as_json)]
+    decoders.append(('etf', etf.loads, as_etf))
+
+    for name, loads, encoded in decoders:
+        took = timeit.timeit(lambda: [loads(data) for data in encoded], number=NUMBER) / NUMBER
+        print(f'{name}: {took * 1000:.1f} ms to decode')
+
+
+if __name__ == '__main__':
+    main()
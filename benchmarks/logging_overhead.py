@@ -0,0 +1,37 @@
+"""
+What logging every received gateway message costs with debug logging off.
+
+Run from the repository root with ``python -m benchmarks.logging_overhead``.
+"""
+import json
+import logging
+import timeit
+
+from discord.utils import LoggedPayload
+
+NUMBER = 200_000
+
+logging.basicConfig(level=logging.INFO)
+_log = logging.getLogger('discord.gateway.shard')
+
+
+def main() -> None:
+    shard_id = 0
+
+    for size in (200, 20_000):
+        raw = json.dumps({'op': 0, 't': 'MESSAGE_CREATE', 'd': {'content': 'x' * size}}).encode()
+
+        def formatted() -> None:
+            _log.debug(f'shard:{shard_id}: received message {raw!r}')
+
+        def guarded() -> None:
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug('shard:%s: received message %s', shard_id, LoggedPayload(raw))
+
+        for name, statement in (('f-string', formatted), ('guarded', guarded)):
+            per_call = timeit.timeit(statement, number=NUMBER) / NUMBER
+            print(f'{len(raw)} B payload, {name}: {per_call * 1e9:.0f} ns per message')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,6 @@ discord.api
 ~~~~~~~~~~~
 Implementation of the Discord API.
 """
-import json
 import logging
 from typing import Any, Optional
 
@@ -12,16 +11,23 @@ from aiohttp import ClientSession
 from discord._about import __version__
 
 from .. import utils
-from .rate_limiter import Executer
+from ..internal import codec
+from .backends import BrokerBackend, MemoryBackend, RateLimitBackend, RateLimitBroker
 from .route import Route
 
-__all__ = ['Route', 'HTTPClient']
+__all__ = ['Route', 'HTTPClient', 'RateLimitBackend', 'MemoryBackend', 'BrokerBackend', 'RateLimitBroker']
 
 _log = logging.getLogger(__name__)
 
 
 class HTTPClient:
-    def __init__(self, token: str, base_url: str = 'https://discord.com/api/v10') -> None:
+    def __init__(
+        self,
+        token: str,
+        base_url: str = 'https://discord.com/api/v10',
+        global_rate_limit: int = 50,
+        rate_limit_backend: RateLimitBackend | None = None,
+    ) -> None:
         self.base_url = base_url
         self._headers = {
             'Authorization': f'Bot {token}',
@@ -29,7 +35,7 @@ class HTTPClient:
         }
 
         self._session: None | ClientSession = None
-        self._executers: list[Executer] = []
+        self._rate_limit_backend = rate_limit_backend or MemoryBackend(global_rate_limit)
 
     async def create_session(self) -> ClientSession:
         return ClientSession()
@@ -39,6 +45,8 @@ class HTTPClient:
             await self._session.close()
             self._session = None
 
+        await self._rate_limit_backend.close()
+
     async def request(
         self, method: str, route: Route, data: Optional[dict[str, Any]] = None, *, reason: Optional[str] = None
     ) -> dict[str, Any] | None:
@@ -53,34 +61,27 @@ class HTTPClient:
             headers['X-Audit-Log-Reason'] = reason
 
         if data:
-            # TODO: Support msgspec
-            encoded_data = json.dumps(data)
+            encoded_data = codec.dumps(data)
             headers.update({'Content-Type': 'application/json'})
         else:
             encoded_data = None
 
-        _log.debug(f'Requesting to {endpoint} with {data}, {headers}')
-
-        for executer in self._executers:
-            if executer.is_global or executer.route == route:
-                _log.debug(f'Pausing request to {endpoint}: Found rate limit executer')
-                await executer.wait()
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug('Requesting to %s with %s, %s', endpoint, utils.LoggedPayload(data), headers)
 
         for _ in range(5):
+            await self._rate_limit_backend.acquire(method, route)
+
             r = await self._session.request(method, endpoint, data=encoded_data, headers=headers)
+            await self._rate_limit_backend.update(method, route, r.headers)
 
             if r.status == 429:
-                _log.debug(f'Request to {endpoint} failed: Request returned rate limit')
-                executer = Executer(route=route)
-
-                self._executers.append(executer)
-                _json = await r.json()
-                await executer.executed(
-                    reset_after=_json['retry_after'],
-                    is_global=r.headers.get('X-RateLimit-Scope') == 'global',
-                    limit=int(r.headers.get('X-RateLimit-Limit', 10)),
-                )
-                self._executers.remove(executer)
+                _log.debug('Request to %s failed: Request returned rate limit', endpoint)
+                _json = codec.loads(await r.read())
+                is_global = r.headers.get('X-RateLimit-Scope') == 'global'
+
+                # the backend holds every request to the route, or every request at all, until retry_after passed
+                await self._rate_limit_backend.lock(method, route, _json['retry_after'], is_global)
                 continue
 
             # TODO: Handle normal errors
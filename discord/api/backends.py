@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import asyncio
+import json
+import logging
+import os
+import stat
+import sys
+import time
+from typing import Any, Mapping
+
+from .rate_limiter import RateLimiter, SlidingWindow
+from .route import Route
+
+__all__ = ['RateLimitBackend', 'MemoryBackend', 'BrokerBackend', 'RateLimitBroker']
+
+_log = logging.getLogger(__name__)
+
+RATE_LIMIT_HEADERS: tuple[str, ...] = (
+    'X-RateLimit-Bucket',
+    'X-RateLimit-Limit',
+    'X-RateLimit-Remaining',
+    'X-RateLimit-Reset-After',
+)
+# a per-user directory, so other users can't squat on or connect to the broker
+_RUNTIME_DIR = os.environ.get('XDG_RUNTIME_DIR') or os.path.expanduser('~')
+DEFAULT_BROKER_PATH = os.path.join(_RUNTIME_DIR, 'discord.io-ratelimit.sock')
+# seconds between attempts to reach a broker which couldn't be reached
+BROKER_RETRY_INTERVAL = 5.0
+
+
+class RateLimitBackend:
+    """
+    Keeps the rate limit state requests are checked against.
+    """
+
+    async def acquire(self, method: str, route: Route) -> None:
+        """
+        Wait until a request to `route` is allowed to be sent.
+        """
+        raise NotImplementedError
+
+    async def update(self, method: str, route: Route, headers: Mapping[str, str]) -> None:
+        """
+        Feed the rate limit headers of a response back into the backend.
+        """
+        raise NotImplementedError
+
+    async def lock(self, method: str, route: Route, retry_after: float, is_global: bool) -> None:
+        """
+        Hold off requests after Discord returned a 429.
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        ...
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Keeps rate limit state inside of this process.
+    """
+
+    def __init__(self, global_rate_limit: int = 50) -> None:
+        self.rate_limiter = RateLimiter()
+        self.global_limiter = SlidingWindow(global_rate_limit)
+
+    async def acquire(self, method: str, route: Route) -> None:
+        await self.rate_limiter.get_bucket(method, route).acquire()
+        await self.global_limiter.acquire()
+
+    async def update(self, method: str, route: Route, headers: Mapping[str, str]) -> None:
+        self.rate_limiter.update(method, route, headers)
+
+    async def lock(self, method: str, route: Route, retry_after: float, is_global: bool) -> None:
+        if is_global:
+            self.global_limiter.lock(retry_after)
+        else:
+            self.rate_limiter.get_bucket(method, route).lock(retry_after)
+
+
+def _route_to_json(route: Route) -> dict[str, Any]:
+    return {'path': route.path, 'major': route.major_parameters}
+
+
+def _route_from_json(data: dict[str, Any]) -> Route:
+    guild_id, channel_id, webhook_id, webhook_token = data['major']
+    return Route(
+        data['path'],
+        guild_id=guild_id,
+        channel_id=channel_id,
+        webhook_id=webhook_id,
+        webhook_token=webhook_token,
+    )
+
+
+class BrokerBackend(RateLimitBackend):
+    """
+    Shares rate limit state with every other process on this host through a :class:`RateLimitBroker`.
+
+    If the broker can't be reached, this falls back to keeping state in-process.
+    """
+
+    def __init__(self, path: str = DEFAULT_BROKER_PATH, global_rate_limit: int = 50) -> None:
+        self.path = path
+        self._fallback = MemoryBackend(global_rate_limit)
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._read_task: asyncio.Task[None] | None = None
+        self._connect_lock = asyncio.Lock()
+        self._waiters: dict[int, asyncio.Future[None]] = {}
+        self._nonce: int = 0
+        self._retry_at: float = 0.0
+        self._unreachable: bool = False
+
+    async def _connect(self) -> bool:
+        if self._writer is not None and not self._writer.is_closing():
+            return True
+
+        if time.monotonic() < self._retry_at:
+            return False
+
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return True
+
+            if time.monotonic() < self._retry_at:
+                return False
+
+            try:
+                self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                self._retry_at = time.monotonic() + BROKER_RETRY_INTERVAL
+
+                # once per outage, not once per request
+                if not self._unreachable:
+                    self._unreachable = True
+                    _log.warning(f'could not connect to rate limit broker at {self.path}, using in-process rate limits')
+                return False
+
+            if self._unreachable:
+                self._unreachable = False
+                _log.info(f'reconnected to rate limit broker at {self.path}')
+
+            self._read_task = asyncio.create_task(self._read())
+            return True
+
+    async def _read(self) -> None:
+        assert self._reader is not None
+
+        try:
+            while line := await self._reader.readline():
+                fut = self._waiters.pop(json.loads(line)['id'], None)
+
+                if fut is not None and not fut.done():
+                    fut.set_result(None)
+        finally:
+            # release everyone waiting, they'll retry against the fallback
+            for fut in self._waiters.values():
+                if not fut.done():
+                    fut.set_exception(ConnectionResetError('rate limit broker connection lost'))
+            self._waiters.clear()
+
+            if self._writer is not None:
+                self._writer.close()
+            self._writer = None
+
+    async def _send(self, data: dict[str, Any]) -> None:
+        assert self._writer is not None
+        self._writer.write(json.dumps(data).encode() + b'\n')
+        await self._writer.drain()
+
+    async def acquire(self, method: str, route: Route) -> None:
+        if not await self._connect():
+            return await self._fallback.acquire(method, route)
+
+        self._nonce += 1
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters[self._nonce] = fut
+
+        try:
+            await self._send({'id': self._nonce, 'op': 'acquire', 'method': method, 'route': _route_to_json(route)})
+            await fut
+        except (ConnectionError, OSError):
+            await self._fallback.acquire(method, route)
+
+    async def update(self, method: str, route: Route, headers: Mapping[str, str]) -> None:
+        if not await self._connect():
+            return await self._fallback.update(method, route, headers)
+
+        try:
+            await self._send(
+                {
+                    'op': 'update',
+                    'method': method,
+                    'route': _route_to_json(route),
+                    'headers': {h: headers[h] for h in RATE_LIMIT_HEADERS if h in headers},
+                }
+            )
+        except (ConnectionError, OSError):
+            await self._fallback.update(method, route, headers)
+
+    async def lock(self, method: str, route: Route, retry_after: float, is_global: bool) -> None:
+        if not await self._connect():
+            return await self._fallback.lock(method, route, retry_after, is_global)
+
+        try:
+            await self._send(
+                {
+                    'op': 'lock',
+                    'method': method,
+                    'route': _route_to_json(route),
+                    'retry_after': retry_after,
+                    'global': is_global,
+                }
+            )
+        except (ConnectionError, OSError):
+            await self._fallback.lock(method, route, retry_after, is_global)
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None:
+            self._read_task.cancel()
+
+
+class RateLimitBroker:
+    """
+    Serves one :class:`MemoryBackend` to every :class:`BrokerBackend` connecting to `path`.
+
+    Run it with ``python -m discord.api.backends [path] [global rate limit]``.
+    The socket is only accessible to the user running the broker, and starting fails if another broker is listening.
+    """
+
+    def __init__(self, path: str = DEFAULT_BROKER_PATH, global_rate_limit: int = 50) -> None:
+        self.path = path
+        self.backend = MemoryBackend(global_rate_limit)
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        await self._remove_stale_socket()
+
+        # only the user running the broker may connect to it
+        umask = os.umask(0o177)
+        try:
+            self._server = await asyncio.start_unix_server(self._handle, self.path)
+        finally:
+            os.umask(umask)
+
+        _log.info(f'rate limit broker listening on {self.path}')
+
+    async def _remove_stale_socket(self) -> None:
+        try:
+            mode = os.lstat(self.path).st_mode
+        except FileNotFoundError:
+            return
+
+        if not stat.S_ISSOCK(mode):
+            raise RuntimeError(f'{self.path} exists and is not a socket')
+
+        try:
+            _, writer = await asyncio.open_unix_connection(self.path)
+        except OSError:
+            # nobody is listening, a broker before this one didn't clean up
+            os.remove(self.path)
+            return
+
+        writer.close()
+        raise RuntimeError(f'a rate limit broker is already listening on {self.path}')
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    async def _acquire(self, writer: asyncio.StreamWriter, nonce: int, method: str, route: Route) -> None:
+        await self.backend.acquire(method, route)
+
+        if not writer.is_closing():
+            writer.write(json.dumps({'id': nonce}).encode() + b'\n')
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks: set[asyncio.Task[None]] = set()
+
+        try:
+            while line := await reader.readline():
+                data = json.loads(line)
+                route = _route_from_json(data['route'])
+
+                if data['op'] == 'acquire':
+                    task = asyncio.create_task(self._acquire(writer, data['id'], data['method'], route))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                elif data['op'] == 'update':
+                    await self.backend.update(data['method'], route, data['headers'])
+                elif data['op'] == 'lock':
+                    await self.backend.lock(data['method'], route, data['retry_after'], data['global'])
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    broker = RateLimitBroker(
+        sys.argv[1] if len(sys.argv) > 1 else DEFAULT_BROKER_PATH,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+    )
+    asyncio.run(broker.serve_forever())
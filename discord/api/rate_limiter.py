@@ -20,47 +20,307 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE
 import asyncio
-from typing import Optional
+from collections import deque
+from typing import Hashable, Mapping, Optional
 
 from .route import Route
 
+__all__ = ['Bucket', 'RateLimiter', 'SlidingWindow', 'Executer']
+
+# how far apart two reset times may be while still describing the same window
+_WINDOW_TOLERANCE: float = 0.25
+# how long a bucket waits on the response telling it its limits, before letting another request try
+_DISCOVERY_TIMEOUT: float = 10.0
+
+
+class Bucket:
+    """
+    A rate limit bucket, as discovered through the X-RateLimit headers Discord returns.
+
+    Requests which can't go out right away wait in FIFO order, and are released in batches
+    as large as the bucket's remaining count whenever it refills.
+
+    Until its limits are known, a bucket lets a single request through and holds the rest
+    until that request's response is fed to :meth:`update`.
+    """
+
+    def __init__(self, limit: int = 1) -> None:
+        self.limit: int = limit
+        self.remaining: int = limit
+        self.reset_at: float = 0.0
+        # the longest reset_after seen, used to guess when a window we opened ourselves ends
+        self.period: float = 0.0
+        self.discovered: bool = False
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _refill(self, now: float) -> None:
+        self.remaining = self.limit
+        self.reset_at = now + (self.period if self.discovered else _DISCOVERY_TIMEOUT)
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        if not self._waiters:
+            now = loop.time()
+
+            if self.reset_at <= now:
+                self._refill(now)
+
+            if self.remaining > 0:
+                self.remaining -= 1
+                return
+
+        fut: asyncio.Future[None] = loop.create_future()
+        self._waiters.append(fut)
+        self._schedule()
+
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # we were given a slot but won't use it, pass it on
+                self.remaining += 1
+                self._release()
+            raise
+
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_at(self.reset_at, self._release)
+
+    def _release(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = asyncio.get_running_loop().time()
+
+        if self.reset_at <= now:
+            self._refill(now)
+
+        while self._waiters and self.remaining > 0:
+            fut = self._waiters.popleft()
+
+            if fut.done():
+                continue
+
+            self.remaining -= 1
+            fut.set_result(None)
+
+        if self._waiters:
+            self._schedule()
+
+    def update(self, limit: int, remaining: int, reset_after: float) -> None:
+        reset_at = asyncio.get_running_loop().time() + reset_after
+        self.limit = limit
+        self.period = max(self.period, reset_after)
+
+        if not self.discovered:
+            self.discovered = True
+            self.remaining = remaining
+            self.reset_at = reset_at
+        elif reset_at > self.reset_at + _WINDOW_TOLERANCE:
+            # a new window has started
+            self.remaining = remaining
+            self.reset_at = reset_at
+        else:
+            # responses can arrive out of order, trust the lowest count we've seen
+            self.remaining = min(self.remaining, remaining)
+
+        if self._waiters:
+            self._release()
+
+    def mark_unlimited(self) -> None:
+        """Called when a response came without rate limit headers, the route isn't limited per bucket."""
+        self.discovered = True
+        self.period = 0.0
+        self.reset_at = 0.0
+
+        if self._waiters:
+            self._release()
+
+    def lock(self, retry_after: float) -> None:
+        self.remaining = 0
+        self.reset_at = asyncio.get_running_loop().time() + retry_after
+
+        if self._waiters:
+            self._release()
+
+    def idle(self, now: float) -> bool:
+        """Whether nobody waits on the bucket and its window has reset, so dropping it loses nothing."""
+        return not self._waiters and self.reset_at <= now
+
+
+class RateLimiter:
+    """
+    Maps routes to their discovered buckets.
+
+    Routes sharing a path are looked up through the bucket hash Discord gave us for that path,
+    and split further by their major parameters.
+    Idle buckets are dropped at most every `sweep_interval` seconds, as new ones are created.
+    """
+
+    def __init__(self, sweep_interval: float = 60.0) -> None:
+        self.sweep_interval = sweep_interval
+        # by path, so bounded by the endpoints used rather than by the guilds or channels touched
+        self._hashes: dict[tuple[str, str], str] = {}
+        self._buckets: dict[Hashable, Bucket] = {}
+        self._swept_at: float = 0.0
+
+    def _key(self, method: str, route: Route) -> Hashable:
+        bucket_hash = self._hashes.get((method, route.path))
+
+        if bucket_hash is None:
+            # not discovered yet, routes hash by path and major parameters
+            return (method, route)
+        return (bucket_hash, route.major_parameters)
+
+    def get_bucket(self, method: str, route: Route) -> Bucket:
+        key = self._key(method, route)
+
+        try:
+            return self._buckets[key]
+        except KeyError:
+            self._sweep()
+            bucket = self._buckets[key] = Bucket()
+            return bucket
+
+    def _sweep(self) -> None:
+        now = asyncio.get_running_loop().time()
+
+        if now - self._swept_at < self.sweep_interval:
+            return
+
+        self._swept_at = now
+        # rebuilt rather than deleted from, a dict never gives back the room of deleted keys
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if not bucket.idle(now)}
+
+    def update(self, method: str, route: Route, headers: Mapping[str, str]) -> Bucket:
+        bucket_hash = headers.get('X-RateLimit-Bucket')
+
+        if bucket_hash is None:
+            bucket = self.get_bucket(method, route)
+            bucket.mark_unlimited()
+            return bucket
+
+        limits = {
+            'limit': int(headers.get('X-RateLimit-Limit', 1)),
+            'remaining': int(headers.get('X-RateLimit-Remaining', 0)),
+            'reset_after': float(headers.get('X-RateLimit-Reset-After', 0)),
+        }
+        # requests may be waiting on the bucket used before the hash was known
+        undiscovered = self._buckets.pop((method, route), None)
+        self._hashes[(method, route.path)] = bucket_hash
+        key = self._key(method, route)
+
+        if undiscovered is not None and key not in self._buckets:
+            self._buckets[key] = undiscovered
+        elif undiscovered is not None:
+            undiscovered.update(**limits)
+
+        bucket = self.get_bucket(method, route)
+        bucket.update(**limits)
+        return bucket
+
+
+class SlidingWindow:
+    """
+    Lets at most `rate` requests through in any `per` second window, used for Discord's global rate limit.
+
+    The time of each of the last `rate` requests is kept, a request only goes out once the oldest of them
+    is at least `per` seconds old.
+    """
+
+    def __init__(self, rate: int, per: float = 1.0) -> None:
+        self.rate: int = rate
+        self.per: float = per
+        self._sent: deque[float] = deque(maxlen=rate)
+        self._locked_until: float = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+
+            while True:
+                now = loop.time()
+
+                if self._locked_until > now:
+                    await asyncio.sleep(self._locked_until - now)
+                    continue
+
+                if len(self._sent) < self.rate:
+                    break
+
+                wait = self._sent[0] + self.per - now
+
+                if wait <= 0:
+                    break
+
+                await asyncio.sleep(wait)
+
+            # the deque is bounded by rate, this drops the oldest time
+            self._sent.append(now)
+
+    def lock(self, retry_after: float) -> None:
+        now = asyncio.get_running_loop().time()
+        self._locked_until = max(self._locked_until, now + retry_after)
+
 
 class Executer:
+    """
+    Holds requests back after Discord returned a 429, then lets them through
+    `limit` at a time every `reset_after` seconds, oldest first.
+    """
+
     def __init__(self, route: Route) -> None:
         self.route = route
         self.is_global: Optional[bool] = None
-        self.holding_queue: Optional[asyncio.Queue[asyncio.Event]] = None
         self.rate_limited: bool = False
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._limit: int = 1
+        self._reset_after: float = 0.0
+        self._first_release: asyncio.Future[None] | None = None
 
     async def executed(self, reset_after: int | float, limit: int, is_global: bool) -> None:
+        loop = asyncio.get_running_loop()
+
         self.rate_limited = True
         self.is_global = is_global
+        self._limit = max(limit, 1)
         self._reset_after = reset_after
-        self.holding_queue = asyncio.Queue()
+        self._first_release = loop.create_future()
+
+        loop.call_later(reset_after, self._release)
 
-        await asyncio.sleep(reset_after)
+        # the caller retries once the limit is over, everyone queued behind it is released in the background
+        await self._first_release
 
-        self.is_global = False
+    def _release(self) -> None:
+        released: int = 0
 
-        # NOTE: This could break if someone did a second global rate limit somehow
-        requests_passed: int = 0
-        for _ in range(self.holding_queue.qsize() - 1):
-            if requests_passed == limit:
-                if not is_global:
-                    await asyncio.sleep(reset_after)
-                else:
-                    await asyncio.sleep(5)
+        while self._waiters and released < self._limit:
+            fut = self._waiters.popleft()
 
-            requests_passed += 1
-            e = await self.holding_queue.get()
-            e.set()
+            if fut.done():
+                continue
+
+            fut.set_result(None)
+            released += 1
+
+        if self._first_release is not None and not self._first_release.done():
+            self._first_release.set_result(None)
+
+        if self._waiters:
+            asyncio.get_running_loop().call_later(self._reset_after, self._release)
+        else:
+            self.rate_limited = False
+            self.is_global = False
 
     async def wait(self) -> None:
         if not self.rate_limited:
             return
 
-        if self.holding_queue:
-            event = asyncio.Event()
-
-            await self.holding_queue.put(event)
-            await event.wait()
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        await fut
@@ -19,7 +19,7 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE
-from typing import Optional, Union
+from typing import Any, Optional, Union
 
 from discord.traits import Snowflake
 
@@ -27,6 +27,17 @@ __all__ = ['Route']
 
 
 class Route:
+    __slots__ = (
+        'path',
+        'guild_id',
+        'channel_id',
+        'webhook_id',
+        'webhook_token',
+        'parameters',
+        'major_parameters',
+        '_hash',
+    )
+
     def __init__(
         self,
         path: str,
@@ -46,6 +57,12 @@ class Route:
 
         self.parameters = parameters
 
+        # snowflakes may be given as either int or str, normalize them so both land in the same bucket
+        self.major_parameters: tuple[Optional[str], ...] = tuple(
+            None if p is None else str(p) for p in (guild_id, channel_id, webhook_id, webhook_token)
+        )
+        self._hash = hash((self.path, self.major_parameters))
+
     def merge(self, url: str):
         return url + self.path.format(
             guild_id=self.guild_id,
@@ -55,10 +72,14 @@ class Route:
             **self.parameters,
         )
 
-    def __eq__(self, route: "Route") -> bool:
-        return (
-            route.channel_id == self.channel_id
-            or route.guild_id == self.guild_id
-            or route.webhook_id == self.webhook_id
-            or route.webhook_token == self.webhook_token
-        )
+    def __eq__(self, route: Any) -> bool:
+        if not isinstance(route, Route):
+            return NotImplemented
+
+        return self._hash == route._hash and self.path == route.path and self.major_parameters == route.major_parameters
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f'<Route path={self.path!r} major_parameters={self.major_parameters!r}>'
@@ -26,5 +26,5 @@ __all__ = ['APIApp']
 
 
 class APIApp:
-    def __init__(self, token: str) -> None:
-        self._http = HTTPClient(token)
+    def __init__(self, token: str, global_rate_limit: int = 50) -> None:
+        self._http = HTTPClient(token, global_rate_limit=global_rate_limit)
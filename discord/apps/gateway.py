@@ -23,18 +23,23 @@
 import asyncio
 import inspect
 import logging
+import time
 from datetime import datetime, timedelta
+from multiprocessing.connection import Connection
 from typing import Any, Callable, Coroutine, Type, TypeVar
 
 from aiohttp import BasicAuth
 
 from ..api import HTTPClient
 from ..api.route import Route
-from ..cache.core import Cache
+from ..cache.core import Cache, StorePolicy
 from ..events.base import BaseEvent, GatewayEvent
-from ..gateway import GatewayState, Orchestrator, concurrer
+from ..flags import Intents
+from ..gateway import ClusterOrchestrator, DispatchPolicy, GatewayState, Orchestrator, SessionStore, concurrer
+from ..gateway.cluster import report_metrics
 from ..interface import print_banner, start_logging
 from ..internal.subscriptor import AsyncFunc, Subscription
+from ..member import Member
 from ..traits import BaseApp
 from ..user import User
 from .api import APIApp
@@ -47,7 +52,7 @@ __all__ = ['GatewayApp']
 T = TypeVar('T')
 
 
-impls = {'cache': Cache, 'user': User}
+impls = {'cache': Cache, 'user': User, 'member': Member}
 
 
 class GatewayApp(BaseApp, APIApp):
@@ -60,10 +65,24 @@ class GatewayApp(BaseApp, APIApp):
         proxy: str | None = None,
         proxy_auth: BasicAuth | None = None,
         impls: dict[str, Any] = impls,
+        global_rate_limit: int = 50,
+        encoding: str = 'json',
+        compress: str = 'zlib-stream',
+        offload_threshold: int | None = None,
+        offload_workers: int | None = None,
+        processes: int | None = None,
+        session_reserve: int = 0,
+        session_store: SessionStore | None = None,
+        dispatch: DispatchPolicy | None = None,
+        concurrent_dispatch: bool = True,
+        cache_policies: dict[str, StorePolicy] | None = None,
     ) -> None:
+        # everything a ClusterOrchestrator worker needs to build this app again
+        self._config: dict[str, Any] = {name: value for name, value in locals().items() if name != 'self'}
         self._log_config = log_config
         self._intents = intents
-        self._state = GatewayState(self, (0, 0), self._intents, impls['cache'](impls), impls)
+        cache = impls['cache'](impls, cache_policies)
+        self._state = GatewayState(self, 1, self._intents, cache, impls, concurrent_dispatch)
 
         if isinstance(shards, int):
             shards = list(range(shards))
@@ -72,13 +91,38 @@ class GatewayApp(BaseApp, APIApp):
         self._active_shards = active_shards
         self._proxy = proxy
         self._proxy_auth = proxy_auth
-        self._left: datetime | None = None
-        self._num: int | None = None
+        self._session_reserve = session_reserve
+        self._session_store = session_store
+        self._dispatch = dispatch
+        self.projected_ready_at: datetime | None = None
+        self._global_rate_limit = global_rate_limit
+        self._encoding = encoding
+        self._compress = compress
+        self._offload_threshold = offload_threshold
+        self._offload_workers = offload_workers
+        self._processes = processes
+        self._max_concurrency: int = 1
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # ClusterOrchestrator workers are spawned, so they get the app as its arguments and subscriptions
+        return _rebuild, (type(self), self._config, self._state.subscriptor.subscriptions)
 
     @property
     def user(self) -> User:
         return self._state.user
 
+    @property
+    def required_intents(self) -> int:
+        """The fewest intents which still deliver every subscribed event"""
+        return Intents.for_events(self._state.subscriptor.events).as_bit
+
+    def _warn_undeliverable(self) -> None:
+        undeliverable = Intents.undeliverable(self._state.subscriptor.events, self._intents)
+
+        if undeliverable:
+            names = ', '.join(sorted(undeliverable))
+            _log.warning(f'no enabled intent delivers {names}, so they will never be received')
+
     async def _fill_concurrer(self) -> None:
         concurrency = await self._http.request('GET', Route('/gateway/bot'))
 
@@ -86,35 +130,95 @@ class GatewayApp(BaseApp, APIApp):
             return
 
         ssl = concurrency['session_start_limit']
-        self._state.concurrency = concurrer.Concurrer(ssl['max_concurrency'], 5)
-        self._num = ssl['remaining']
-        self._left = datetime.now() + timedelta(milliseconds=ssl['reset_after'])
+        self._max_concurrency = ssl['max_concurrency']
+        self._state.concurrency = concurrer.IdentifyScheduler(ssl['max_concurrency'])
+        self._state.budget = concurrer.SessionBudget(
+            ssl['total'],
+            ssl['remaining'],
+            ssl['reset_after'] / 1000,
+            reserve=self._session_reserve,
+            shared=self._processes is not None,
+        )
 
     async def start(self, token: str) -> None:
-        self._http = HTTPClient(token)
+        self._http = HTTPClient(token, global_rate_limit=self._global_rate_limit)
         self._state.loop_activated()
         await self._fill_concurrer()
 
         print_banner()
         start_logging(self._log_config)
-        if self._num is not None and self._left is not None:
+
+        self._warn_undeliverable()
+        budget = self._state.budget
+        if budget is not None:
+            reset_in = timedelta(seconds=int(max(budget.reset_at - time.time(), 0)))
+            left = max(budget.remaining - len(self.shards), 0)
             _log.info(
-                f'sessions left remains at {self._num}, minus what will be used by the orchestrator you will have {self._num - len(self.shards)} remaining.'
+                f'sessions left remains at {budget.remaining}, '
+                f'minus what will be used by the orchestrator you will have {left} remaining.'
             )
-            _log.info(f'session count will reset in {self._left.hour} hour(s) and {self._left.minute} minute(s)')
+            _log.info(f'session count will reset in {reset_in}')
+
+            if budget.remaining - budget.reserve < len(self.shards):
+                _log.warning(
+                    f'not enough sessions left to identify all {len(self.shards)} shards, '
+                    'some will wait for the session count to reset'
+                )
+
+        self.projected_ready_at = datetime.now() + timedelta(
+            seconds=concurrer.project_boot(self.shards, self._max_concurrency, budget=budget)
+        )
+        _log.info(f'all shards are projected to have identified by {self.projected_ready_at:%Y-%m-%d %H:%M:%S}')
 
         _log.info('attempting initiation of orchestrator')
-        self.orchestrator = Orchestrator(
+        if self._processes is not None:
+            self.orchestrator = ClusterOrchestrator(
+                self, token, self.shards, self._processes, max_concurrency=self._max_concurrency, budget=budget
+            )
+        else:
+            self.orchestrator = self._make_orchestrator(token, self.shards)
+        await self.orchestrator.orchestrate()
+        _log.info('asynchronous orchestration phase completed')
+        await self._block_until_complete()
+
+    def _make_orchestrator(self, token: str, shards: list[int]) -> Orchestrator:
+        return Orchestrator(
             token,
             self._state,
-            self.shards,
+            shards,
             active_shards=self._active_shards,
             proxy=self._proxy,
             proxy_auth=self._proxy_auth,
+            encoding=self._encoding,
+            compress=self._compress,
+            offload_threshold=self._offload_threshold,
+            offload_workers=self._offload_workers,
+            session_store=self._session_store,
+            dispatch=self._dispatch,
         )
+
+    async def _start_worker(
+        self,
+        token: str,
+        shards: list[int],
+        concurrency: concurrer.SharedIdentifyScheduler,
+        budget: concurrer.SessionBudget | None,
+        metrics: Connection,
+    ) -> None:
+        # runs inside of a ClusterOrchestrator worker process
+        start_logging(self._log_config)
+        self._http = HTTPClient(token, global_rate_limit=self._global_rate_limit)
+        self._state.loop_activated()
+        self._state.concurrency = concurrency
+        self._state.budget = budget
+        self.orchestrator = self._make_orchestrator(token, shards)
+        reporter = asyncio.create_task(report_metrics(self.orchestrator, metrics))
         await self.orchestrator.orchestrate()
-        _log.info('asynchronous orchestration phase completed')
-        await self._block_until_complete()
+
+        try:
+            await self._block_until_complete()
+        finally:
+            reporter.cancel()
 
     async def _block_until_complete(self) -> None:
         try:
@@ -125,7 +229,6 @@ class GatewayApp(BaseApp, APIApp):
                 await self._http.close_session()
                 _log.info('closed http session')
                 await self.orchestrator.shutdown()
-                await self.orchestrator._session.close()
                 _log.info('successfully shutdown orchestrator')
                 return
 
@@ -159,3 +262,12 @@ class GatewayApp(BaseApp, APIApp):
             return func
 
         return wrapper
+
+
+def _rebuild(cls: Type[GatewayApp], config: dict[str, Any], subscriptions: list[Subscription]) -> GatewayApp:
+    app = cls(**config)
+
+    for subscription in subscriptions:
+        app._state.subscriptor.add_subscription(subscription)
+
+    return app
@@ -3,4 +3,5 @@ discord.cache
 ~~~~~~~~~~~~~
 Implementation of a persistent and scalable cache interface
 """
+from .columnar import *
 from .core import *
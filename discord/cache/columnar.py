@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+"""
+A member store for very large guilds, keeping members in typed columns instead of one object each.
+
+Use it with ``impls['member_store'] = ColumnarMemberStore``.
+"""
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator
+
+from ..internal import undefined
+from ..member import Member
+from .core import StorePolicy
+
+__all__ = ['ColumnarMemberStore', 'MemberView']
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_TIMESTAMP = -(1 << 63)
+# fields only kept when they differ from these
+_DEFAULTS: dict[str, Any] = {
+    'nick': None,
+    'avatar': None,
+    'premium_since': None,
+    'deaf': False,
+    'mute': False,
+    'flags': 0,
+    'pending': False,
+    'communication_disabled_until': None,
+}
+
+
+def _to_micros(value: datetime | None) -> int:
+    if value is None:
+        return _NO_TIMESTAMP
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(value: int) -> datetime | None:
+    return None if value == _NO_TIMESTAMP else _EPOCH + timedelta(microseconds=value)
+
+
+class MemberView:
+    """
+    A member of a :class:`ColumnarMemberStore`, read from its columns when accessed.
+    """
+
+    __slots__ = ('_store', 'user_id')
+
+    def __init__(self, store: 'ColumnarMemberStore', user_id: int) -> None:
+        self._store = store
+        self.user_id = user_id
+
+    @property
+    def roles(self) -> tuple[int, ...]:
+        return self._store._roles_of(self._store._row(self.user_id))
+
+    @property
+    def joined_at(self) -> datetime | None:
+        return _from_micros(self._store._joined_at[self._store._row(self.user_id)])
+
+    def update(self, data: dict[str, Any]) -> None:
+        member = self._store._materialize(self.user_id)
+        member.update(data)
+        self._store.upsert(self.user_id, member)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            default = _DEFAULTS[name]
+        except KeyError:
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}') from None
+
+        self._store._row(self.user_id)
+        return self._store._fields[name].get(self.user_id, default)
+
+
+class ColumnarMemberStore:
+    """
+    Members of one guild, in columns of machine integers.
+
+    Role ids of every member are packed into one array, a member owning a slice of it.
+    Fields left at their default take no space, :class:`MemberView` reads them as the default.
+    Only :attr:`StorePolicy.enabled` is supported, members are never evicted.
+    """
+
+    def __init__(self, policy: StorePolicy | None = None) -> None:
+        self.policy = policy or StorePolicy()
+
+        if self.policy.max_entries is not None or self.policy.ttl is not None:
+            raise ValueError('ColumnarMemberStore does not support max_entries or ttl')
+
+        self._ids = array('Q')
+        # microseconds since the epoch
+        self._joined_at = array('q')
+        self._role_start = array('I')
+        self._role_count = array('H')
+        self._roles = array('Q')
+        # the user id owning each role slot, 0 once the slot was released
+        self._role_owners = array('Q')
+        self._released: int = 0
+        self._rows: dict[int, int] = {}
+        # the members whose field differs from its default, by field
+        self._fields: dict[str, dict[int, Any]] = {name: {} for name in _DEFAULTS}
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    def _row(self, user_id: int) -> int:
+        try:
+            return self._rows[user_id]
+        except KeyError:
+            raise LookupError(f'member {user_id} is no longer cached') from None
+
+    def _roles_of(self, row: int) -> tuple[int, ...]:
+        start = self._role_start[row]
+        return tuple(self._roles[start : start + self._role_count[row]])
+
+    def _release_roles(self, row: int) -> None:
+        start = self._role_start[row]
+        count = self._role_count[row]
+        self._role_owners[start : start + count] = array('Q', bytes(8 * count))
+        self._released += count
+
+    def _materialize(self, user_id: int) -> Member:
+        row = self._row(user_id)
+        member = Member.__new__(Member)
+        member.user_id = user_id
+        member.roles = self._roles_of(row)
+        member.joined_at = _from_micros(self._joined_at[row])
+
+        for name, values in self._fields.items():
+            if user_id in values:
+                setattr(member, name, values[user_id])
+
+        return member
+
+    def get(self, user_id: int) -> MemberView | None:
+        return MemberView(self, user_id) if user_id in self._rows else None
+
+    def upsert(self, user_id: int, member: Any) -> None:
+        if not self.policy.enabled:
+            return
+
+        roles = member.roles
+        row = self._rows.get(user_id)
+
+        if row is None:
+            row = self._rows[user_id] = len(self._ids)
+            self._ids.append(user_id)
+            self._joined_at.append(0)
+            self._role_start.append(0)
+            self._role_count.append(0)
+        else:
+            self._release_roles(row)
+
+        self._joined_at[row] = _to_micros(member.joined_at)
+        self._role_start[row] = len(self._roles)
+        self._role_count[row] = len(roles)
+        self._roles.extend(roles)
+        self._role_owners.extend([user_id] * len(roles))
+
+        for name, default in _DEFAULTS.items():
+            value = getattr(member, name)
+
+            if value is not undefined.UNDEFINED and value != default:
+                self._fields[name][user_id] = value
+            else:
+                self._fields[name].pop(user_id, None)
+
+        if self._released > 1024 and self._released * 2 > len(self._roles):
+            self._compact()
+
+    def delete(self, user_id: int) -> Member | None:
+        if user_id not in self._rows:
+            return None
+
+        member = self._materialize(user_id)
+        row = self._rows.pop(user_id)
+        self._release_roles(row)
+        for values in self._fields.values():
+            values.pop(user_id, None)
+
+        # move the last row into the one deleted
+        last = len(self._ids) - 1
+        if row != last:
+            moved = self._ids[last]
+            self._ids[row] = moved
+            self._joined_at[row] = self._joined_at[last]
+            self._role_start[row] = self._role_start[last]
+            self._role_count[row] = self._role_count[last]
+            self._rows[moved] = row
+
+        for column in (self._ids, self._joined_at, self._role_start, self._role_count):
+            column.pop()
+
+        return member
+
+    def _compact(self) -> None:
+        roles = array('Q')
+        owners = array('Q')
+
+        for row, user_id in enumerate(self._ids):
+            start = self._role_start[row]
+            count = self._role_count[row]
+            self._role_start[row] = len(roles)
+            roles.extend(self._roles[start : start + count])
+            owners.extend([user_id] * count)
+
+        self._roles = roles
+        self._role_owners = owners
+        self._released = 0
+
+    def with_role(self, role_id: int) -> list[int]:
+        """The ids of every member with the role `role_id`"""
+        # searched for as raw bytes, so the scan itself never leaves C
+        haystack = self._roles.tobytes()
+        needle = role_id.to_bytes(8, sys.byteorder)
+        user_ids: list[int] = []
+        position = haystack.find(needle)
+
+        while position != -1:
+            if position % 8 == 0:
+                owner = self._role_owners[position // 8]
+
+                if owner:
+                    user_ids.append(owner)
+
+                position = haystack.find(needle, position + 8)
+            else:
+                position = haystack.find(needle, position + 1)
+
+        return user_ids
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._rows))
+
+    def values(self) -> Iterator[MemberView]:
+        return (MemberView(self, user_id) for user_id in list(self._rows))
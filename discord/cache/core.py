@@ -19,11 +19,422 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE
-from typing import Any
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Iterator, TypeVar
 
-__all__ = ['Cache']
+from attrs import define
+
+from ..member import Member
+
+__all__ = ['Cache', 'Store', 'StorePolicy']
+
+T = TypeVar('T')
+
+
+@define(weakref_slot=False)
+class StorePolicy:
+    max_entries: int | None = None
+    """
+    Evict the least recently used entity beyond this many
+    """
+
+    ttl: float | None = None
+    """
+    Seconds an entity stays cached after it was last upserted
+    """
+
+    enabled: bool = True
+    """
+    Whether to cache this kind of entity at all
+    """
+
+
+class Store(Generic[T]):
+    """
+    Entities of one kind, keyed by their snowflake.
+    """
+
+    def __init__(self, policy: StorePolicy | None = None) -> None:
+        self.policy = policy or StorePolicy()
+        # only bounded stores pay for keeping entities in eviction order
+        self._ordered = self.policy.max_entries is not None or self.policy.ttl is not None
+        self._items: dict[int, T] = OrderedDict() if self._ordered else {}
+        self._expires_at: dict[int, float] = {}
+        self.evictions: int = 0
+        """Entities dropped for `max_entries`"""
+        self.expirations: int = 0
+        """Entities dropped for `ttl`"""
+
+    def get(self, id: int) -> T | None:
+        if not self._ordered:
+            return self._items.get(id)
+
+        entity = self._items.get(id)
+
+        if entity is None:
+            return None
+
+        if self.policy.ttl is not None and self._expires_at[id] <= time.monotonic():
+            self.delete(id)
+            self.expirations += 1
+            return None
+
+        if self.policy.max_entries is not None:
+            self._items.move_to_end(id)  # type: ignore[attr-defined]
+
+        return entity
+
+    def upsert(self, id: int, entity: T) -> None:
+        if not self.policy.enabled:
+            return
+
+        self._items[id] = entity
+
+        if not self._ordered:
+            return
+
+        self._items.move_to_end(id)  # type: ignore[attr-defined]
+
+        if self.policy.ttl is not None:
+            now = time.monotonic()
+            self._expires_at[id] = now + self.policy.ttl
+            self._expire(now)
+
+        if self.policy.max_entries is not None:
+            while len(self._items) > self.policy.max_entries:
+                oldest, _ = self._items.popitem(last=False)  # type: ignore[call-arg]
+                self._expires_at.pop(oldest, None)
+                self.evictions += 1
+
+    def _expire(self, now: float) -> None:
+        # entities are kept in upsert order, so the expired ones are in front, give or take reads under max_entries
+        while self._items:
+            oldest = next(iter(self._items))
+
+            if self._expires_at[oldest] > now:
+                return
+
+            self.delete(oldest)
+            self.expirations += 1
+
+    def delete(self, id: int) -> T | None:
+        self._expires_at.pop(id, None)
+        return self._items.pop(id, None)
+
+    def __contains__(self, id: int) -> bool:
+        return self.get(id) is not None if self._ordered else id in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(list(self._items) if self._ordered else self._items)
+
+    def values(self) -> Iterator[T]:
+        if self.policy.ttl is None:
+            return iter(list(self._items.values()) if self._ordered else self._items.values())
+
+        now = time.monotonic()
+        return iter([entity for id, entity in self._items.items() if self._expires_at[id] > now])
+
+
+# dispatches the cache always handles
+CORE_EVENTS: frozenset[str] = frozenset(
+    {
+        'GUILD_CREATE',
+        'GUILD_UPDATE',
+        'GUILD_DELETE',
+        'GUILD_ROLE_CREATE',
+        'GUILD_ROLE_UPDATE',
+        'GUILD_ROLE_DELETE',
+        'CHANNEL_CREATE',
+        'CHANNEL_UPDATE',
+        'CHANNEL_DELETE',
+        'THREAD_CREATE',
+        'THREAD_UPDATE',
+        'THREAD_DELETE',
+        'GUILD_MEMBER_ADD',
+        'GUILD_MEMBER_UPDATE',
+        'GUILD_MEMBER_REMOVE',
+        'GUILD_MEMBERS_CHUNK',
+        'USER_UPDATE',
+    }
+)
+# dispatches only handled while their store is enabled
+STORE_EVENTS: dict[str, frozenset[str]] = {
+    'messages': frozenset({'MESSAGE_CREATE', 'MESSAGE_UPDATE', 'MESSAGE_DELETE', 'MESSAGE_DELETE_BULK'}),
+    'presences': frozenset({'PRESENCE_UPDATE'}),
+}
+STORES: tuple[str, ...] = ('guilds', 'channels', 'users', 'members', 'messages', 'presences')
+# opt-in, so their dispatches aren't decoded for nobody, e.g. StorePolicy(max_entries=1000) enables messages
+DEFAULT_POLICIES: dict[str, StorePolicy] = {
+    'messages': StorePolicy(enabled=False),
+    'presences': StorePolicy(enabled=False),
+}
 
 
 class Cache:
-    def __init__(self, impls: dict[str, Any]) -> None:
+    """
+    Guilds, channels, users, members, messages and presences as the gateway reports them.
+
+    Users are built with ``impls['user']`` and members with ``impls['member']``,
+    everything else is kept as the payload Discord sent.
+    Stores are built with ``impls['store']``, and the members of each guild with ``impls['member_store']``,
+    each given the policy in `policies` under its name: guilds, channels, users, members, messages or presences.
+    Member and presence policies apply to each guild separately.
+    Messages and presences are only cached once given a policy.
+    """
+
+    def __init__(self, impls: dict[str, Any], policies: dict[str, StorePolicy] | None = None) -> None:
         self._impls = impls
+        self.policies: dict[str, StorePolicy] = {**DEFAULT_POLICIES, **(policies or {})}
+        self._store: Callable[[StorePolicy | None], Store] = impls.get('store', Store)
+        self._member_store: Callable[[StorePolicy | None], Store] = impls.get('member_store', self._store)
+        self._member: Callable[[dict[str, Any]], Any] = impls.get('member', Member)
+
+        self.guilds: Store[dict[str, Any]] = self._store(self.policies.get('guilds'))
+        self.channels: Store[dict[str, Any]] = self._store(self.policies.get('channels'))
+        self.users: Store[Any] = self._store(self.policies.get('users'))
+        self.messages: Store[dict[str, Any]] = self._store(self.policies['messages'])
+        # built once up front, so a policy the member store can't honour fails here rather than mid GUILD_CREATE
+        self._member_store(self.policies.get('members'))
+        self.members: dict[int, Store[Any]] = {}
+        """The members of each guild, by guild id"""
+        self.presences: dict[int, Store[dict[str, Any]]] = {}
+        """The presences of each guild, by guild id"""
+        self.channels_by_guild: dict[int, set[int]] = {}
+
+        self.events: frozenset[str] = CORE_EVENTS.union(
+            *(events for store, events in STORE_EVENTS.items() if self.policies[store].enabled)
+        )
+        """Dispatches the cache needs, whether or not anyone subscribed to them"""
+
+        self._handlers: dict[str, Callable[[Any], None]] = {
+            event: getattr(self, f'_{event.lower()}') for event in self.events
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Whether anything is cached at all"""
+        return any((self.policies.get(name) or StorePolicy()).enabled for name in STORES)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Entities, evictions and expirations of each store, with the stores of every guild added up"""
+        stores: dict[str, list[Store]] = {
+            'guilds': [self.guilds],
+            'channels': [self.channels],
+            'users': [self.users],
+            'messages': [self.messages],
+            'members': list(self.members.values()),
+            'presences': list(self.presences.values()),
+        }
+
+        return {
+            name: {
+                'entities': sum(len(store) for store in group),
+                'evictions': sum(store.evictions for store in group),
+                'expirations': sum(store.expirations for store in group),
+            }
+            for name, group in stores.items()
+        }
+
+    def handle(self, event: str, data: Any) -> None:
+        """Update the cache from a dispatch, events it doesn't handle are ignored"""
+        handler = self._handlers.get(event)
+
+        if handler is not None:
+            handler(data)
+
+    # lookups
+
+    def get_guild(self, guild_id: int) -> dict[str, Any] | None:
+        return self.guilds.get(guild_id)
+
+    def get_channel(self, channel_id: int) -> dict[str, Any] | None:
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id: int) -> Any | None:
+        return self.users.get(user_id)
+
+    def get_member(self, guild_id: int, user_id: int) -> Any | None:
+        members = self.members.get(guild_id)
+        return None if members is None else members.get(user_id)
+
+    def get_guild_channels(self, guild_id: int) -> list[dict[str, Any]]:
+        channels = (self.channels.get(id) for id in self.channels_by_guild.get(guild_id, ()))
+        return [channel for channel in channels if channel is not None]
+
+    def get_guild_members(self, guild_id: int) -> Store[Any] | None:
+        return self.members.get(guild_id)
+
+    def get_message(self, message_id: int) -> dict[str, Any] | None:
+        return self.messages.get(message_id)
+
+    def get_presence(self, guild_id: int, user_id: int) -> dict[str, Any] | None:
+        presences = self.presences.get(guild_id)
+        return None if presences is None else presences.get(user_id)
+
+    # upserts
+
+    def _upsert_user(self, data: dict[str, Any]) -> int:
+        user_id = int(data['id'])
+        self.users.upsert(user_id, self._impls['user'](data, self))
+        return user_id
+
+    def _upsert_channel(self, data: dict[str, Any], guild_id: int | None = None) -> None:
+        channel_id = int(data['id'])
+
+        if guild_id is None and 'guild_id' in data:
+            guild_id = int(data['guild_id'])
+
+        self.channels.upsert(channel_id, data)
+
+        if guild_id is not None:
+            self.channels_by_guild.setdefault(guild_id, set()).add(channel_id)
+
+    def _upsert_member(self, guild_id: int, data: dict[str, Any]) -> None:
+        user_id = self._upsert_user(data['user'])
+
+        members = self.members.get(guild_id)
+        if members is None:
+            members = self.members[guild_id] = self._member_store(self.policies.get('members'))
+
+        # GUILD_MEMBER_UPDATE only carries some fields
+        member = members.get(user_id)
+        if member is None:
+            members.upsert(user_id, self._member(data))
+        else:
+            member.update(data)
+
+    def _upsert_presence(self, guild_id: int, data: dict[str, Any]) -> None:
+        presences = self.presences.get(guild_id)
+        if presences is None:
+            presences = self.presences[guild_id] = self._store(self.policies['presences'])
+
+        presences.upsert(int(data['user']['id']), data)
+
+    def _delete_channel(self, data: dict[str, Any]) -> None:
+        channel_id = int(data['id'])
+        self.channels.delete(channel_id)
+
+        if 'guild_id' in data:
+            self.channels_by_guild.get(int(data['guild_id']), set()).discard(channel_id)
+
+    # handlers
+
+    def _guild_create(self, data: dict[str, Any]) -> None:
+        guild_id = int(data['id'])
+        guild = dict(data)
+
+        for channel in guild.pop('channels', ()):
+            self._upsert_channel(channel, guild_id)
+
+        for thread in guild.pop('threads', ()):
+            self._upsert_channel(thread, guild_id)
+
+        for member in guild.pop('members', ()):
+            self._upsert_member(guild_id, member)
+
+        presences = guild.pop('presences', ())
+        if self.policies['presences'].enabled:
+            for presence in presences:
+                self._upsert_presence(guild_id, presence)
+
+        guild['roles'] = {int(role['id']): role for role in guild.get('roles', ())}
+        self.guilds.upsert(guild_id, guild)
+
+    def _guild_update(self, data: dict[str, Any]) -> None:
+        guild_id = int(data['id'])
+        guild = self.guilds.get(guild_id)
+        update = dict(data)
+        update['roles'] = {int(role['id']): role for role in update.get('roles', ())}
+
+        if guild is None:
+            self.guilds.upsert(guild_id, update)
+        else:
+            guild.update(update)
+
+    def _guild_delete(self, data: dict[str, Any]) -> None:
+        guild_id = int(data['id'])
+
+        if data.get('unavailable'):
+            # an outage, the guild comes back with a GUILD_CREATE
+            guild = self.guilds.get(guild_id)
+            if guild is not None:
+                guild['unavailable'] = True
+            return
+
+        self.guilds.delete(guild_id)
+        self.members.pop(guild_id, None)
+        self.presences.pop(guild_id, None)
+
+        for channel_id in self.channels_by_guild.pop(guild_id, ()):
+            self.channels.delete(channel_id)
+
+    def _guild_role_create(self, data: dict[str, Any]) -> None:
+        guild = self.guilds.get(int(data['guild_id']))
+
+        if guild is not None:
+            role = data['role']
+            guild['roles'][int(role['id'])] = role
+
+    _guild_role_update = _guild_role_create
+
+    def _guild_role_delete(self, data: dict[str, Any]) -> None:
+        guild = self.guilds.get(int(data['guild_id']))
+
+        if guild is not None:
+            guild['roles'].pop(int(data['role_id']), None)
+
+    def _channel_create(self, data: dict[str, Any]) -> None:
+        self._upsert_channel(data)
+
+    _channel_update = _channel_create
+    _thread_create = _channel_create
+    _thread_update = _channel_create
+
+    def _channel_delete(self, data: dict[str, Any]) -> None:
+        self._delete_channel(data)
+
+    _thread_delete = _channel_delete
+
+    def _guild_member_add(self, data: dict[str, Any]) -> None:
+        self._upsert_member(int(data['guild_id']), data)
+
+    _guild_member_update = _guild_member_add
+
+    def _guild_member_remove(self, data: dict[str, Any]) -> None:
+        members = self.members.get(int(data['guild_id']))
+
+        if members is not None:
+            members.delete(int(data['user']['id']))
+
+    def _guild_members_chunk(self, data: dict[str, Any]) -> None:
+        guild_id = int(data['guild_id'])
+
+        for member in data['members']:
+            self._upsert_member(guild_id, member)
+
+    def _user_update(self, data: dict[str, Any]) -> None:
+        self._upsert_user(data)
+
+    def _message_create(self, data: dict[str, Any]) -> None:
+        self.messages.upsert(int(data['id']), data)
+
+    def _message_update(self, data: dict[str, Any]) -> None:
+        # updates only carry what changed, an update for a message not cached isn't worth caching
+        message = self.messages.get(int(data['id']))
+
+        if message is not None:
+            message.update(data)
+
+    def _message_delete(self, data: dict[str, Any]) -> None:
+        self.messages.delete(int(data['id']))
+
+    def _message_delete_bulk(self, data: dict[str, Any]) -> None:
+        for message_id in data['ids']:
+            self.messages.delete(int(message_id))
+
+    def _presence_update(self, data: dict[str, Any]) -> None:
+        self._upsert_presence(int(data['guild_id']), data)
@@ -20,10 +20,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE
 
-from types import SimpleNamespace
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, ClassVar
 
 import typing_extensions
+from attrs import define, field
 
 from discord import traits
 
@@ -32,12 +32,13 @@ if TYPE_CHECKING:
     from ..user import User
 
 
-class BaseEvent(SimpleNamespace):
-    _type: str | None = None
-    _app: traits.BaseApp
+@define(slots=True, init=False, weakref_slot=False)
+class BaseEvent:
+    _type: ClassVar[str | None] = None
+    _app: traits.BaseApp = field(repr=False)
 
     @classmethod
-    def construct(cls, app: "GatewayApp" | traits.BaseApp, data: dict[str, Any]) -> None:
+    def construct(cls, app: "GatewayApp | traits.BaseApp", data: dict[str, Any]) -> typing_extensions.Self:
         ...
 
     @property
@@ -45,14 +46,14 @@ class BaseEvent(SimpleNamespace):
         return self._app
 
 
+@define(slots=True, init=False, weakref_slot=False)
 class GatewayEvent(BaseEvent):
-    _app: "GatewayApp"
-
     @property
     def app(self) -> "GatewayApp":
-        return self._app
+        return self._app  # type: ignore
 
 
+@define(slots=True, init=False, weakref_slot=False)
 class Ready(GatewayEvent):
     _type = 'on_ready'
     version: int
@@ -75,12 +76,13 @@ class Ready(GatewayEvent):
         return self
 
 
+@define(slots=True, init=False, weakref_slot=False)
 class UnknownEvent(BaseEvent):
     """
     An event which is either unknown or not subscribed to
     """
 
-    _type: str = 'UNKNOWN'
+    _type = 'UNKNOWN'
     unknown_data: dict[str, Any]
 
     @classmethod
@@ -20,12 +20,89 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE
 
-from typing import Callable, Type, TypeVar
+from typing import Callable, Iterable, Type, TypeVar
 
 F = TypeVar('F', bound='Flags')
 
 __all__ = ['Intents']
 
+# the dispatches each intent enables, events missing here (READY, INTERACTION_CREATE, ...) need none
+INTENT_EVENTS: dict[str, frozenset[str]] = {
+    'guilds': frozenset(
+        {
+            'GUILD_CREATE',
+            'GUILD_UPDATE',
+            'GUILD_DELETE',
+            'GUILD_ROLE_CREATE',
+            'GUILD_ROLE_UPDATE',
+            'GUILD_ROLE_DELETE',
+            'CHANNEL_CREATE',
+            'CHANNEL_UPDATE',
+            'CHANNEL_DELETE',
+            'CHANNEL_PINS_UPDATE',
+            'THREAD_CREATE',
+            'THREAD_UPDATE',
+            'THREAD_DELETE',
+            'THREAD_LIST_SYNC',
+            'THREAD_MEMBER_UPDATE',
+            'THREAD_MEMBERS_UPDATE',
+            'STAGE_INSTANCE_CREATE',
+            'STAGE_INSTANCE_UPDATE',
+            'STAGE_INSTANCE_DELETE',
+        }
+    ),
+    'guild_members': frozenset(
+        {
+            'GUILD_MEMBER_ADD',
+            'GUILD_MEMBER_UPDATE',
+            'GUILD_MEMBER_REMOVE',
+            'THREAD_MEMBERS_UPDATE',
+        }
+    ),
+    'guild_bans': frozenset({'GUILD_BAN_ADD', 'GUILD_BAN_REMOVE', 'GUILD_AUDIT_LOG_ENTRY_CREATE'}),
+    'guild_emojis_and_stickers': frozenset({'GUILD_EMOJIS_UPDATE', 'GUILD_STICKERS_UPDATE'}),
+    'guild_integrations': frozenset(
+        {'GUILD_INTEGRATIONS_UPDATE', 'INTEGRATION_CREATE', 'INTEGRATION_UPDATE', 'INTEGRATION_DELETE'}
+    ),
+    'guild_webhooks': frozenset({'WEBHOOKS_UPDATE'}),
+    'guild_invites': frozenset({'INVITE_CREATE', 'INVITE_DELETE'}),
+    'guild_voice_states': frozenset({'VOICE_STATE_UPDATE'}),
+    'guild_presences': frozenset({'PRESENCE_UPDATE'}),
+    'guild_messages': frozenset({'MESSAGE_CREATE', 'MESSAGE_UPDATE', 'MESSAGE_DELETE', 'MESSAGE_DELETE_BULK'}),
+    'guild_message_reactions': frozenset(
+        {
+            'MESSAGE_REACTION_ADD',
+            'MESSAGE_REACTION_REMOVE',
+            'MESSAGE_REACTION_REMOVE_ALL',
+            'MESSAGE_REACTION_REMOVE_EMOJI',
+        }
+    ),
+    'guild_message_typing': frozenset({'TYPING_START'}),
+    'direct_messages': frozenset({'MESSAGE_CREATE', 'MESSAGE_UPDATE', 'MESSAGE_DELETE', 'CHANNEL_PINS_UPDATE'}),
+    'direct_message_reactions': frozenset(
+        {
+            'MESSAGE_REACTION_ADD',
+            'MESSAGE_REACTION_REMOVE',
+            'MESSAGE_REACTION_REMOVE_ALL',
+            'MESSAGE_REACTION_REMOVE_EMOJI',
+        }
+    ),
+    'direct_message_typing': frozenset({'TYPING_START'}),
+    'guild_scheduled_events': frozenset(
+        {
+            'GUILD_SCHEDULED_EVENT_CREATE',
+            'GUILD_SCHEDULED_EVENT_UPDATE',
+            'GUILD_SCHEDULED_EVENT_DELETE',
+            'GUILD_SCHEDULED_EVENT_USER_ADD',
+            'GUILD_SCHEDULED_EVENT_USER_REMOVE',
+        }
+    ),
+    'auto_moderation_configuration': frozenset(
+        {'AUTO_MODERATION_RULE_CREATE', 'AUTO_MODERATION_RULE_UPDATE', 'AUTO_MODERATION_RULE_DELETE'}
+    ),
+    'auto_moderation_execution': frozenset({'AUTO_MODERATION_ACTION_EXECUTION'}),
+}
+
 
 class flag:
     def __init__(self, func: Callable):
@@ -68,6 +145,31 @@ class Flags:
 
 
 class Intents(Flags):
+    @classmethod
+    def for_events(cls, events: Iterable[str]) -> 'Intents':
+        """
+        The fewest intents under which Discord sends every event in `events`, e.g. ``MESSAGE_CREATE``.
+
+        Events sent for both guilds and direct messages enable the intents of both.
+        """
+        events = frozenset(events)
+        return cls(**{name: True for name, enabled in INTENT_EVENTS.items() if enabled & events})
+
+    @classmethod
+    def undeliverable(cls, events: Iterable[str], intents: int) -> frozenset[str]:
+        """
+        The events in `events` Discord never sends under `intents`, as none of the intents delivering them is enabled.
+        """
+        events = frozenset(events)
+        # the intents delivering each event, any one of them is enough
+        delivering: dict[str, int] = {}
+
+        for name, enabled in INTENT_EVENTS.items():
+            for event in enabled & events:
+                delivering[event] = delivering.get(event, 0) | getattr(cls, name)
+
+        return frozenset(event for event, needed in delivering.items() if not needed & intents)
+
     @flag
     def guilds(self) -> bool | int:
         return 1 << 0
@@ -3,6 +3,10 @@ discord.gateway
 ~~~~~~~~~~~~~~~
 Implementation of the Discord Gateway
 """
+from .cluster import *
+from .dispatcher import *
+from .metrics import *
 from .orchestrator import *
 from .shard import *
 from .state import *
+from .store import *
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import TYPE_CHECKING
+
+from .concurrer import SessionBudget, SharedIdentifyScheduler
+from .metrics import ShardMetrics, render_prometheus
+
+if TYPE_CHECKING:
+    from ..apps import GatewayApp
+    from .orchestrator import Orchestrator
+
+__all__ = ['ClusterOrchestrator']
+
+_log = logging.getLogger(__name__)
+
+# seconds between a worker sending the metrics of its shards
+METRICS_INTERVAL: float = 5.0
+# seconds between checking on workers
+SUPERVISE_INTERVAL: float = 1.0
+
+
+def _run_worker(
+    app: "GatewayApp",
+    token: str,
+    shards: list[int],
+    concurrency: SharedIdentifyScheduler,
+    budget: SessionBudget | None,
+    metrics: Connection,
+) -> None:
+    try:
+        asyncio.run(app._start_worker(token, shards, concurrency, budget, metrics))
+    except KeyboardInterrupt:
+        pass
+
+
+async def report_metrics(
+    orchestrator: "Orchestrator",
+    connection: Connection,
+    interval: float = METRICS_INTERVAL,
+) -> None:
+    """
+    Send the metrics of `orchestrator` to the :class:`ClusterOrchestrator` over `connection` every `interval` seconds.
+    """
+    while True:
+        try:
+            connection.send(orchestrator.metrics)
+        except OSError:
+            # the cluster went away
+            return
+
+        await asyncio.sleep(interval)
+
+
+class ClusterOrchestrator:
+    """
+    Splits shards across worker processes, each running its own :class:`Orchestrator`.
+
+    Workers are spawned as fresh interpreters rather than forked from a process which may already run
+    an event loop, threads or sessions. Each rebuilds the app from its arguments and subscriptions, so callbacks
+    have to be importable and the script running the app has to guard doing so with ``if __name__ == '__main__'``.
+    Workers are restarted if they exit unexpectedly, and identifies are bucketed by ``shard_id % max_concurrency``
+    across all of them.
+    """
+
+    def __init__(
+        self,
+        app: "GatewayApp",
+        token: str,
+        shards: list[int],
+        processes: int,
+        max_concurrency: int = 1,
+        restart_delay: float = 5.0,
+        budget: SessionBudget | None = None,
+    ) -> None:
+        if processes < 1:
+            raise ValueError('processes must be at least 1')
+
+        self.app = app
+        self.token = token
+        self.processes = min(processes, len(shards))
+        self.restart_delay = restart_delay
+        self.concurrency = SharedIdentifyScheduler(max_concurrency)
+        self.budget = budget
+
+        self._shards: list[list[int]] = [shards[i :: self.processes] for i in range(self.processes)]
+        self._context = multiprocessing.get_context('spawn')
+        self.workers: list[BaseProcess | None] = [None] * self.processes
+        self._connections: list[Connection | None] = [None] * self.processes
+        self._metrics: list[dict[int, ShardMetrics]] = [{} for _ in range(self.processes)]
+        self._supervisor: asyncio.Task[None] | None = None
+        self._closing: bool = False
+
+    def _spawn(self, worker_id: int) -> None:
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_run_worker,
+            args=(self.app, self.token, self._shards[worker_id], self.concurrency, self.budget, sender),
+            name=f'discord.io-worker-{worker_id}',
+            daemon=True,
+        )
+        process.start()
+        # the worker has its own copy now
+        sender.close()
+        self.workers[worker_id] = process
+        self._connections[worker_id] = receiver
+        _log.info(f'started worker {worker_id} (pid {process.pid}) with shards {self._shards[worker_id]}')
+
+    async def orchestrate(self) -> None:
+        for worker_id in range(self.processes):
+            self._spawn(worker_id)
+
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    def _collect(self, worker_id: int) -> None:
+        connection = self._connections[worker_id]
+
+        try:
+            while connection is not None and connection.poll():
+                self._metrics[worker_id] = connection.recv()
+        except (EOFError, OSError):
+            # the worker is gone, which supervising it takes care of
+            pass
+
+    def _close_connection(self, worker_id: int) -> None:
+        connection = self._connections[worker_id]
+
+        if connection is not None:
+            connection.close()
+            self._connections[worker_id] = None
+
+    async def _supervise(self) -> None:
+        while not self._closing:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+
+            for worker_id, process in enumerate(self.workers):
+                self._collect(worker_id)
+
+                if process is None or process.exitcode is None or self._closing:
+                    continue
+
+                delay = self.restart_delay
+                _log.error(f'worker {worker_id} exited with code {process.exitcode}, restarting in {delay} seconds')
+                self.workers[worker_id] = None
+                self._close_connection(worker_id)
+                asyncio.get_running_loop().call_later(self.restart_delay, self._restart, worker_id)
+
+    def _restart(self, worker_id: int) -> None:
+        if not self._closing:
+            self._spawn(worker_id)
+
+    @property
+    def metrics(self) -> dict[int, ShardMetrics]:
+        """The metrics of every shard, by shard id, as last reported by their worker"""
+        return {shard_id: metrics for worker in self._metrics for shard_id, metrics in worker.items()}
+
+    @property
+    def latency(self) -> float | None:
+        """The average of the last heartbeat round trip of each shard"""
+        latencies = [m.latency for m in self.metrics.values() if m.latency is not None]
+
+        if not latencies:
+            return None
+
+        return sum(latencies) / len(latencies)
+
+    def prometheus(self) -> str:
+        """The metrics of every shard, in the Prometheus text format"""
+        return render_prometheus(self.metrics.items())
+
+    async def shutdown(self) -> None:
+        self._closing = True
+
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+
+        loop = asyncio.get_running_loop()
+
+        for worker_id, process in enumerate(self.workers):
+            if process is None:
+                continue
+
+            _log.info(f'shutting down worker {worker_id}')
+
+            # interrupt rather than terminate, so the worker closes its shards cleanly
+            if process.pid is not None and process.exitcode is None:
+                os.kill(process.pid, signal.SIGINT)
+
+            await loop.run_in_executor(None, process.join, 10)
+
+            if process.exitcode is None:
+                process.terminate()
+
+            self.workers[worker_id] = None
+            self._close_connection(worker_id)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+"""
+Transport compression for Gateway connections.
+"""
+import zlib
+
+__all__ = ['DecompressionError', 'Decompressor', 'ZlibStreamDecompressor', 'ZstdStreamDecompressor', 'DECOMPRESSORS']
+
+ZLIB_SUFFIX = b'\x00\x00\xff\xff'
+
+
+class DecompressionError(Exception):
+    """
+    A message couldn't be decompressed.
+    """
+
+
+class Decompressor:
+    """
+    Turns the binary messages of a compressed Gateway connection back into payloads.
+
+    One is made per connection, as the compression context lives as long as the connection does.
+    """
+
+    name: str
+    """
+    The value of the ``compress`` query parameter this decompressor handles
+    """
+
+    def feed(self, data: bytes) -> bytes | None:
+        """
+        Feed a binary message, returning a complete payload once one is available.
+        """
+        raise NotImplementedError
+
+
+class ZlibStreamDecompressor(Decompressor):
+    """
+    Inflates zlib-stream messages as they arrive.
+
+    A payload may be split across several messages, only the last of which ends in :data:`ZLIB_SUFFIX`.
+    Each fragment is inflated straight away, and the output of fragmented payloads is collected in a
+    buffer which is reused for the lifetime of the connection.
+    """
+
+    name = 'zlib-stream'
+
+    def __init__(self) -> None:
+        self._inflator = zlib.decompressobj()
+        self._buffer = bytearray()
+        # the last bytes seen, as the suffix itself may be split across messages
+        self._tail = b''
+
+    def feed(self, data: bytes) -> bytes | None:
+        try:
+            out = self._inflator.decompress(data)
+        except zlib.error as exc:
+            self._buffer.clear()
+            raise DecompressionError(str(exc)) from exc
+
+        self._tail = (self._tail + data[-4:])[-4:]
+
+        if self._tail != ZLIB_SUFFIX:
+            self._buffer += out
+            return None
+
+        if not self._buffer:
+            # the payload came in one message, which is the common case
+            return out
+
+        self._buffer += out
+        payload = bytes(self._buffer)
+        self._buffer.clear()
+        return payload
+
+
+class ZstdStreamDecompressor(Decompressor):
+    name = 'zstd-stream'
+
+    def __init__(self) -> None:
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError('zstd-stream compression requires the zstandard module')
+
+        self._error = zstandard.ZstdError
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def feed(self, data: bytes) -> bytes | None:
+        try:
+            # Discord flushes the stream at the end of every payload
+            return self._decompressor.decompress(data) or None
+        except self._error as exc:
+            raise DecompressionError(str(exc)) from exc
+
+
+DECOMPRESSORS: dict[str, type[Decompressor]] = {
+    ZlibStreamDecompressor.name: ZlibStreamDecompressor,
+    ZstdStreamDecompressor.name: ZstdStreamDecompressor,
+}
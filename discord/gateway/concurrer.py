@@ -20,12 +20,22 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE
 
+import asyncio
+import logging
+import multiprocessing
+import threading
 import time
 from asyncio import AbstractEventLoop, Future, get_running_loop
+from multiprocessing.sharedctypes import SynchronizedArray
 
 import typing_extensions
 
-__all__ = ['Concurrer']
+_log = logging.getLogger(__name__)
+
+__all__ = ['Concurrer', 'IdentifyScheduler', 'SharedIdentifyScheduler', 'SessionBudget', 'project_boot']
+
+# ClusterOrchestrator spawns its workers, and locks can only be shared with processes of the context they came from
+_shared = multiprocessing.get_context('spawn')
 
 
 class Concurrer:
@@ -62,7 +72,7 @@ class Concurrer:
 
         for _ in range(self.concurrency):
             try:
-                self._reserved.pop().set_result(None)
+                self._reserved.pop(0).set_result(None)
             except IndexError:
                 break
 
@@ -71,3 +81,152 @@ class Concurrer:
             self.loop.call_later(self.per, self.reset)
         else:
             self.pending_reset = False
+
+
+class IdentifyScheduler:
+    """
+    Rate limits identifies the way Discord buckets them.
+
+    Shards share a bucket when ``shard_id % max_concurrency`` is equal,
+    and each bucket allows one identify every `per` seconds.
+    """
+
+    def __init__(self, max_concurrency: int, per: float | int = 5) -> None:
+        self.max_concurrency: int = max(max_concurrency, 1)
+        self.per: float | int = per
+        self._buckets: list[Concurrer] = [Concurrer(1, per) for _ in range(self.max_concurrency)]
+
+    def for_shard(self, shard_id: int) -> Concurrer:
+        return self._buckets[shard_id % self.max_concurrency]
+
+
+class _SharedBucket:
+    def __init__(self, scheduler: "SharedIdentifyScheduler", bucket: int) -> None:
+        self.scheduler = scheduler
+        self.bucket = bucket
+
+    async def __aenter__(self) -> typing_extensions.Self:
+        while delay := self.scheduler._take(self.bucket):
+            await asyncio.sleep(delay)
+
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        ...
+
+
+class SharedIdentifyScheduler:
+    """
+    An :class:`IdentifyScheduler` which can be shared between processes.
+
+    Each bucket remembers when it was last taken in shared memory, and can be taken again `per` seconds later.
+    Since nothing has to be given back, a process dying while holding a bucket can't leak it.
+    """
+
+    def __init__(self, max_concurrency: int, per: float | int = 5) -> None:
+        self.max_concurrency: int = max(max_concurrency, 1)
+        self.per: float | int = per
+        self._buckets: SynchronizedArray = _shared.Array('d', self.max_concurrency)
+
+    def _take(self, bucket: int) -> float:
+        # returns 0 if the bucket was taken, otherwise how long until it frees up
+        with self._buckets.get_lock():
+            now = time.time()
+            free_at = self._buckets[bucket] + self.per
+
+            if free_at <= now:
+                self._buckets[bucket] = now
+                return 0.0
+
+            return free_at - now
+
+    def for_shard(self, shard_id: int) -> _SharedBucket:
+        return _SharedBucket(self, shard_id % self.max_concurrency)
+
+
+class SessionBudget:
+    """
+    Tracks the session starts Discord allows per day, as given by ``session_start_limit``.
+
+    Identifies which would take the remaining count below `reserve` are delayed until the budget resets,
+    rather than burning through it. With `shared`, the budget lives in shared memory,
+    so the worker processes of a :class:`ClusterOrchestrator` draw from it too.
+    """
+
+    def __init__(self, total: int, remaining: int, reset_after: float, reserve: int = 0, shared: bool = False) -> None:
+        self.reserve: int = reserve
+        # total, remaining and the (wall clock) time the budget resets at
+        values = [float(total), float(remaining), time.time() + reset_after]
+
+        if shared:
+            array = _shared.Array('d', values)
+            self._values = array
+            self._lock = array.get_lock()
+        else:
+            self._values = values
+            self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return int(self._values[0])
+
+    @property
+    def remaining(self) -> int:
+        return int(self._values[1])
+
+    @property
+    def reset_at(self) -> float:
+        return self._values[2]
+
+    def _take(self) -> float:
+        # returns 0 if a session start was taken, otherwise how long until the budget resets
+        with self._lock:
+            now = time.time()
+
+            if self._values[2] <= now:
+                # Discord doesn't tell us the next reset, assume the usual day
+                self._values[1] = self._values[0]
+                self._values[2] = now + 86400
+
+            if self._values[1] > self.reserve:
+                self._values[1] -= 1
+                return 0.0
+
+            return self._values[2] - now
+
+    async def acquire(self) -> None:
+        while delay := self._take():
+            _log.warning(f'session start budget exhausted, delaying identify by {delay:.0f} seconds')
+            await asyncio.sleep(delay)
+
+
+def _identify_time(shard_ids: list[int], max_concurrency: int, per: float | int) -> float:
+    buckets: dict[int, int] = {}
+    for shard_id in shard_ids:
+        bucket = shard_id % max_concurrency
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+
+    # the first identify in each bucket goes out right away
+    return max(max(buckets.values(), default=0) - 1, 0) * per
+
+
+def project_boot(
+    shard_ids: list[int], max_concurrency: int, per: float | int = 5, budget: SessionBudget | None = None
+) -> float:
+    """
+    Project how many seconds it takes until every shard in `shard_ids` has identified.
+    """
+    max_concurrency = max(max_concurrency, 1)
+
+    if budget is not None:
+        available = max(budget.remaining - budget.reserve, 0)
+
+        if available < len(shard_ids):
+            # the rest have to wait on the budget resetting
+            delay = max(budget.reset_at - time.time(), 0)
+            return max(
+                _identify_time(shard_ids[:available], max_concurrency, per),
+                delay + _identify_time(shard_ids[available:], max_concurrency, per),
+            )
+
+    return _identify_time(shard_ids, max_concurrency, per)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+"""
+Bounded dispatching of gateway events to subscribers.
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Coroutine
+
+from attrs import define, field
+
+from .metrics import ShardMetrics
+
+__all__ = ['DispatchPolicy', 'Dispatcher']
+
+_log = logging.getLogger(__name__)
+OVERFLOWS: tuple[str, ...] = ('block', 'drop_oldest', 'drop_types')
+
+
+@define(weakref_slot=False)
+class DispatchPolicy:
+    workers: int = 4
+    """
+    How many events of a shard may be handled at once
+    """
+
+    queue_size: int = 256
+    """
+    How many events each worker may have waiting before `overflow` applies
+    """
+
+    overflow: str = 'drop_types'
+    """
+    What to do with an event arriving at a full queue.
+
+    ``block`` stops reading from the gateway until there's room, ``drop_oldest`` drops the longest waiting event
+    and ``drop_types`` drops the event if its type is in `drop_types`, blocking otherwise.
+    """
+
+    block_timeout: float | None = 10.0
+    """
+    How long to block for room before dropping the event anyway, or None to wait forever
+    """
+
+    drop_types: frozenset[str] = field(default=frozenset({'TYPING_START', 'PRESENCE_UPDATE'}), converter=frozenset)
+    """
+    The event types ``drop_types`` may drop
+    """
+
+    def __attrs_post_init__(self) -> None:
+        if self.overflow not in OVERFLOWS:
+            raise ValueError(f'overflow must be one of {OVERFLOWS}')
+
+        if self.workers < 1 or self.queue_size < 1:
+            raise ValueError('workers and queue_size must be at least 1')
+
+        if self.block_timeout is not None and self.block_timeout <= 0:
+            raise ValueError('block_timeout must be positive')
+
+
+class Dispatcher:
+    """
+    Hands events to `handler` from a fixed set of workers, each with its own bounded queue.
+
+    Every event of one type goes to the same worker, so events of a type are handled in the order they arrived.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, Any], Coroutine[Any, Any, Any]],
+        policy: DispatchPolicy | None = None,
+        metrics: ShardMetrics | None = None,
+    ) -> None:
+        self.handler = handler
+        self.policy = policy or DispatchPolicy()
+        self._metrics = metrics
+        self._queues: list[asyncio.Queue[tuple[str, Any]]] = [
+            asyncio.Queue(self.policy.queue_size) for _ in range(self.policy.workers)
+        ]
+        self._workers: list[asyncio.Task[None]] = []
+        self.blocking = False
+        """Whether `put` is currently waiting for room"""
+        self.stalls = 0
+        """How many times `put` had to wait for room"""
+
+    def start(self) -> None:
+        if self._workers:
+            return
+
+        self._workers = [asyncio.create_task(self._work(queue)) for queue in self._queues]
+
+    async def put(self, type: str, data: Any) -> None:
+        queue = self._queues[hash(type) % len(self._queues)]
+
+        if not queue.full():
+            queue.put_nowait((type, data))
+            return
+
+        overflow = self.policy.overflow
+
+        if overflow == 'drop_oldest':
+            dropped, _ = queue.get_nowait()
+            queue.task_done()
+            self._dropped(dropped)
+            queue.put_nowait((type, data))
+        elif overflow == 'drop_types' and type in self.policy.drop_types:
+            self._dropped(type)
+        else:
+            self.blocking = True
+            self.stalls += 1
+
+            try:
+                await asyncio.wait_for(queue.put((type, data)), self.policy.block_timeout)
+            except asyncio.TimeoutError:
+                _log.warning(f'dropping {type} after blocking for {self.policy.block_timeout} seconds')
+                self._dropped(type)
+            finally:
+                self.blocking = False
+
+    def _dropped(self, type: str) -> None:
+        if self._metrics is not None:
+            self._metrics.dropped_events[type] += 1
+
+    async def _work(self, queue: asyncio.Queue[tuple[str, Any]]) -> None:
+        while True:
+            type, data = await queue.get()
+
+            try:
+                await self.handler(type, data)
+            except Exception:
+                _log.exception(f'failed to dispatch {type}')
+            finally:
+                queue.task_done()
+
+    @property
+    def pending(self) -> int:
+        """How many events are waiting to be handled"""
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
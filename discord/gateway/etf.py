@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+"""
+An Erlang External Term Format encoder and decoder, for the Gateway's ``encoding=etf``.
+
+Binaries decode to :class:`str`, atoms to :class:`str` (or ``None``/:class:`bool` for ``nil``/``true``/``false``)
+and big integers, which Discord uses for snowflakes, to :class:`int`.
+"""
+import struct
+import zlib
+from typing import Any, Callable
+
+__all__ = ['loads', 'dumps']
+
+FORMAT_VERSION = 131
+
+NEW_FLOAT_EXT = 70
+COMPRESSED = 80
+SMALL_INTEGER_EXT = 97
+INTEGER_EXT = 98
+FLOAT_EXT = 99
+ATOM_EXT = 100
+SMALL_TUPLE_EXT = 104
+LARGE_TUPLE_EXT = 105
+NIL_EXT = 106
+STRING_EXT = 107
+LIST_EXT = 108
+BINARY_EXT = 109
+SMALL_BIG_EXT = 110
+LARGE_BIG_EXT = 111
+SMALL_ATOM_EXT = 115
+MAP_EXT = 116
+ATOM_UTF8_EXT = 118
+SMALL_ATOM_UTF8_EXT = 119
+
+_ATOMS: dict[str, Any] = {'nil': None, 'true': True, 'false': False}
+
+_u8 = struct.Struct('>B').unpack_from
+_u16 = struct.Struct('>H').unpack_from
+_u32 = struct.Struct('>I').unpack_from
+_i32 = struct.Struct('>i').unpack_from
+_f64 = struct.Struct('>d').unpack_from
+
+
+class _Decoder:
+    __slots__ = ('data', 'pos', '_terms')
+
+    def __init__(self, data: bytes | bytearray | memoryview) -> None:
+        self.data = memoryview(data)
+        self.pos = 0
+        self._terms: dict[int, Callable[[], Any]] = {
+            NEW_FLOAT_EXT: self._new_float,
+            SMALL_INTEGER_EXT: self._small_integer,
+            INTEGER_EXT: self._integer,
+            FLOAT_EXT: self._float,
+            ATOM_EXT: self._atom,
+            SMALL_TUPLE_EXT: self._small_tuple,
+            LARGE_TUPLE_EXT: self._large_tuple,
+            NIL_EXT: self._nil,
+            STRING_EXT: self._string,
+            LIST_EXT: self._list,
+            BINARY_EXT: self._binary,
+            SMALL_BIG_EXT: self._small_big,
+            LARGE_BIG_EXT: self._large_big,
+            SMALL_ATOM_EXT: self._small_atom,
+            MAP_EXT: self._map,
+            ATOM_UTF8_EXT: self._atom,
+            SMALL_ATOM_UTF8_EXT: self._small_atom,
+        }
+
+    def term(self) -> Any:
+        tag = self.data[self.pos]
+        self.pos += 1
+
+        try:
+            decode = self._terms[tag]
+        except KeyError:
+            raise ValueError(f'Unknown ETF tag {tag}') from None
+
+        return decode()
+
+    def _take(self, size: int) -> memoryview:
+        chunk = self.data[self.pos : self.pos + size]
+        if len(chunk) != size:
+            raise ValueError('Unexpected end of ETF data')
+        self.pos += size
+        return chunk
+
+    def _new_float(self) -> float:
+        (value,) = _f64(self.data, self.pos)
+        self.pos += 8
+        return value
+
+    def _small_integer(self) -> int:
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def _integer(self) -> int:
+        (value,) = _i32(self.data, self.pos)
+        self.pos += 4
+        return value
+
+    def _float(self) -> float:
+        return float(bytes(self._take(31)).rstrip(b'\x00'))
+
+    def _atom_text(self, size: int) -> Any:
+        name = str(self._take(size), 'utf-8')
+        return _ATOMS.get(name, name)
+
+    def _atom(self) -> Any:
+        (size,) = _u16(self.data, self.pos)
+        self.pos += 2
+        return self._atom_text(size)
+
+    def _small_atom(self) -> Any:
+        size = self.data[self.pos]
+        self.pos += 1
+        return self._atom_text(size)
+
+    def _small_tuple(self) -> tuple[Any, ...]:
+        arity = self.data[self.pos]
+        self.pos += 1
+        return tuple([self.term() for _ in range(arity)])
+
+    def _large_tuple(self) -> tuple[Any, ...]:
+        (arity,) = _u32(self.data, self.pos)
+        self.pos += 4
+        return tuple([self.term() for _ in range(arity)])
+
+    def _nil(self) -> list[Any]:
+        return []
+
+    def _string(self) -> str:
+        (size,) = _u16(self.data, self.pos)
+        self.pos += 2
+        return str(self._take(size), 'latin-1')
+
+    def _list(self) -> list[Any]:
+        (length,) = _u32(self.data, self.pos)
+        self.pos += 4
+        items = [self.term() for _ in range(length)]
+
+        # proper lists end in NIL, anything else is an improper tail
+        if self.data[self.pos] == NIL_EXT:
+            self.pos += 1
+        else:
+            items.append(self.term())
+
+        return items
+
+    def _binary(self) -> str:
+        (size,) = _u32(self.data, self.pos)
+        self.pos += 4
+        return str(self._take(size), 'utf-8')
+
+    def _big(self, size: int) -> int:
+        sign = self.data[self.pos]
+        self.pos += 1
+        value = int.from_bytes(self._take(size), 'little')
+        return -value if sign else value
+
+    def _small_big(self) -> int:
+        size = self.data[self.pos]
+        self.pos += 1
+        return self._big(size)
+
+    def _large_big(self) -> int:
+        (size,) = _u32(self.data, self.pos)
+        self.pos += 4
+        return self._big(size)
+
+    def _map(self) -> dict[Any, Any]:
+        (arity,) = _u32(self.data, self.pos)
+        self.pos += 4
+        term = self.term
+        return {term(): term() for _ in range(arity)}
+
+
+def loads(data: bytes | bytearray | memoryview) -> Any:
+    if not data or data[0] != FORMAT_VERSION:
+        raise ValueError('ETF data is missing the format version')
+
+    if len(data) > 1 and data[1] == COMPRESSED:
+        try:
+            (size,) = _u32(data, 2)
+            inflated = zlib.decompress(bytes(data[6:]))
+        except (struct.error, zlib.error) as exc:
+            raise ValueError('Compressed ETF term is invalid') from exc
+        if len(inflated) != size:
+            raise ValueError('Compressed ETF term has an invalid size')
+        data = bytes([FORMAT_VERSION]) + inflated
+
+    decoder = _Decoder(data)
+    decoder.pos = 1
+
+    try:
+        return decoder.term()
+    except (IndexError, struct.error) as exc:
+        raise ValueError('Unexpected end of ETF data') from exc
+    except TypeError as exc:
+        # a map keyed by a list or map
+        raise ValueError('ETF map has an unhashable key') from exc
+
+
+def _encode_atom(buf: bytearray, name: str) -> None:
+    encoded = name.encode()
+    buf.append(SMALL_ATOM_UTF8_EXT)
+    buf.append(len(encoded))
+    buf += encoded
+
+
+def _encode(buf: bytearray, obj: Any) -> None:
+    if obj is None:
+        _encode_atom(buf, 'nil')
+    elif obj is True:
+        _encode_atom(buf, 'true')
+    elif obj is False:
+        _encode_atom(buf, 'false')
+    elif isinstance(obj, int):
+        if 0 <= obj <= 255:
+            buf.append(SMALL_INTEGER_EXT)
+            buf.append(obj)
+        elif -(2**31) <= obj < 2**31:
+            buf.append(INTEGER_EXT)
+            buf += struct.pack('>i', obj)
+        else:
+            magnitude = abs(obj)
+            encoded = magnitude.to_bytes((magnitude.bit_length() + 7) // 8, 'little')
+            if len(encoded) > 255:
+                buf.append(LARGE_BIG_EXT)
+                buf += struct.pack('>I', len(encoded))
+            else:
+                buf.append(SMALL_BIG_EXT)
+                buf.append(len(encoded))
+            buf.append(1 if obj < 0 else 0)
+            buf += encoded
+    elif isinstance(obj, float):
+        buf.append(NEW_FLOAT_EXT)
+        buf += struct.pack('>d', obj)
+    elif isinstance(obj, str):
+        encoded = obj.encode()
+        buf.append(BINARY_EXT)
+        buf += struct.pack('>I', len(encoded))
+        buf += encoded
+    elif isinstance(obj, (bytes, bytearray)):
+        buf.append(BINARY_EXT)
+        buf += struct.pack('>I', len(obj))
+        buf += obj
+    elif isinstance(obj, dict):
+        buf.append(MAP_EXT)
+        buf += struct.pack('>I', len(obj))
+        for key, value in obj.items():
+            _encode(buf, key)
+            _encode(buf, value)
+    elif isinstance(obj, (list, tuple)):
+        if not obj:
+            buf.append(NIL_EXT)
+            return
+
+        buf.append(LIST_EXT)
+        buf += struct.pack('>I', len(obj))
+        for item in obj:
+            _encode(buf, item)
+        buf.append(NIL_EXT)
+    else:
+        raise TypeError(f'Object of type {type(obj).__name__} is not ETF serializable')
+
+
+def dumps(obj: Any) -> bytes:
+    buf = bytearray([FORMAT_VERSION])
+    _encode(buf, obj)
+    return bytes(buf)
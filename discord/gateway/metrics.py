@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+"""
+Metrics collected by shards, with an optional Prometheus text exporter.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+    from .cluster import ClusterOrchestrator
+    from .orchestrator import Orchestrator
+
+__all__ = ['Histogram', 'ShardMetrics', 'render_prometheus', 'serve_prometheus']
+
+LATENCY_BUCKETS: tuple[float, ...] = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DECODE_BUCKETS: tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+
+
+class Histogram:
+    """
+    Counts observations into fixed buckets, the way Prometheus histograms do.
+    """
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total = 0
+        result: list[tuple[str, int]] = []
+
+        for bound, count in zip((*map(repr, self.buckets), '+Inf'), self.counts):
+            total += count
+            result.append((bound, total))
+
+        return result
+
+
+class ShardMetrics:
+    """
+    What a single shard has measured since it was created.
+    """
+
+    def __init__(self) -> None:
+        self.heartbeat_latency = Histogram(LATENCY_BUCKETS)
+        self.latency: float | None = None
+        """The last heartbeat round trip, in seconds"""
+        self.decode_time = Histogram(DECODE_BUCKETS)
+        self.events: defaultdict[str, int] = defaultdict(int)
+        self.bytes_compressed: int = 0
+        self.bytes_decompressed: int = 0
+        self.reconnects: int = 0
+        self.close_codes: defaultdict[int, int] = defaultdict(int)
+        self.dropped_events: defaultdict[str, int] = defaultdict(int)
+        self.pending_events: int = 0
+        """Events waiting to be dispatched, as of the last frame received"""
+
+
+def _label(value: object) -> str:
+    # event types come off the wire, so escape them the way the exposition format wants
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _histogram(lines: list[str], name: str, labels: str, histogram: Histogram) -> None:
+    for bound, count in histogram.cumulative():
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+
+def render_prometheus(metrics: Iterable[tuple[int, ShardMetrics]]) -> str:
+    """
+    Render `(shard id, metrics)` pairs in the Prometheus text exposition format.
+    """
+    families: dict[str, tuple[str, str, list[str]]] = {
+        'latency': ('gauge', 'Last heartbeat round trip in seconds', []),
+        'heartbeat_latency_seconds': ('histogram', 'Heartbeat round trips in seconds', []),
+        'decode_seconds': ('histogram', 'Time spent decompressing and decoding messages', []),
+        'events_total': ('counter', 'Dispatches received, by event type', []),
+        'received_bytes_total': ('counter', 'Bytes received, before and after decompression', []),
+        'reconnects_total': ('counter', 'Reconnects', []),
+        'closes_total': ('counter', 'Closed connections, by close code', []),
+        'dropped_events_total': ('counter', 'Dispatches dropped on a full queue, by event type', []),
+        'pending_events': ('gauge', 'Dispatches waiting to be handled', []),
+    }
+
+    for shard_id, m in metrics:
+        shard = f'shard="{shard_id}"'
+
+        if m.latency is not None:
+            families['latency'][2].append(f'discord_shard_latency{{{shard}}} {m.latency}')
+
+        heartbeats = families['heartbeat_latency_seconds'][2]
+        _histogram(heartbeats, 'discord_shard_heartbeat_latency_seconds', shard, m.heartbeat_latency)
+        _histogram(families['decode_seconds'][2], 'discord_shard_decode_seconds', shard, m.decode_time)
+
+        for event, count in m.events.items():
+            families['events_total'][2].append(f'discord_shard_events_total{{{shard},type="{_label(event)}"}} {count}')
+
+        families['received_bytes_total'][2].extend(
+            (
+                f'discord_shard_received_bytes_total{{{shard},stage="compressed"}} {m.bytes_compressed}',
+                f'discord_shard_received_bytes_total{{{shard},stage="decompressed"}} {m.bytes_decompressed}',
+            )
+        )
+        families['reconnects_total'][2].append(f'discord_shard_reconnects_total{{{shard}}} {m.reconnects}')
+
+        for code, count in m.close_codes.items():
+            families['closes_total'][2].append(f'discord_shard_closes_total{{{shard},code="{code}"}} {count}')
+
+        for event, count in m.dropped_events.items():
+            families['dropped_events_total'][2].append(
+                f'discord_shard_dropped_events_total{{{shard},type="{_label(event)}"}} {count}'
+            )
+
+        families['pending_events'][2].append(f'discord_shard_pending_events{{{shard}}} {m.pending_events}')
+
+    lines: list[str] = []
+    for family, (kind, doc, samples) in families.items():
+        name = f'discord_shard_{family}'
+        lines.append(f'# HELP {name} {doc}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(samples)
+
+    return '\n'.join(lines) + '\n'
+
+
+async def serve_prometheus(
+    orchestrator: "Orchestrator | ClusterOrchestrator", host: str = '127.0.0.1', port: int = 9090
+) -> "web.AppRunner":
+    """
+    Serve the metrics of `orchestrator` on ``http://host:port/metrics``.
+
+    Returns the runner, call ``await runner.cleanup()`` to stop serving.
+    """
+    from aiohttp import web
+
+    async def handler(_: web.Request) -> web.Response:
+        return web.Response(text=render_prometheus(orchestrator.metrics.items()), content_type='text/plain')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -23,11 +23,15 @@
 
 import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import aiohttp
 
+from .dispatcher import DispatchPolicy
+from .metrics import ShardMetrics, render_prometheus
 from .shard import Shard
 from .state import GatewayState
+from .store import SessionStore
 
 __all__ = ['Orchestrator']
 
@@ -43,6 +47,12 @@ class Orchestrator:
         active_shards: int | None = None,
         proxy: str | None = None,
         proxy_auth: aiohttp.BasicAuth | None = None,
+        encoding: str = 'json',
+        compress: str = 'zlib-stream',
+        offload_threshold: int | None = None,
+        offload_workers: int | None = None,
+        session_store: SessionStore | None = None,
+        dispatch: DispatchPolicy | None = None,
     ) -> None:
         self.token = token
         self.shards: list[Shard] = []
@@ -61,11 +71,34 @@ class Orchestrator:
 
         self.proxy = proxy
         self.proxy_auth = proxy_auth
+        self.encoding = encoding
+        self.compress = compress
+        self.offload_threshold = offload_threshold
+        self.session_store = session_store
+        self.dispatch = dispatch
+        self._executor: ThreadPoolExecutor | None = None
+
+        if offload_threshold is not None:
+            self._executor = ThreadPoolExecutor(max_workers=offload_workers, thread_name_prefix='discord.io-decode')
 
     async def orchestrate(self) -> None:
         t = []
         for shard_id in self._shards:
-            shard = Shard(self.token, shard_id, self.active_shards, self._session, self._state, self.proxy, self.proxy_auth)
+            shard = Shard(
+                self.token,
+                shard_id,
+                self.active_shards,
+                self._session,
+                self._state,
+                self.proxy,
+                self.proxy_auth,
+                encoding=self.encoding,
+                compress=self.compress,
+                offload_threshold=self.offload_threshold,
+                executor=self._executor,
+                session_store=self.session_store,
+                dispatch=self.dispatch,
+            )
 
             t.append(shard.start())
 
@@ -73,16 +106,47 @@ class Orchestrator:
 
         await asyncio.gather(*t)
 
+    @property
+    def metrics(self) -> dict[int, ShardMetrics]:
+        """The metrics of every shard, by shard id"""
+        return {shard.id: shard.metrics for shard in self.shards}
+
+    @property
+    def latency(self) -> float | None:
+        """The average of the last heartbeat round trip of each shard"""
+        latencies = [m.latency for m in self.metrics.values() if m.latency is not None]
+
+        if not latencies:
+            return None
+
+        return sum(latencies) / len(latencies)
+
+    def prometheus(self) -> str:
+        """The metrics of every shard, in the Prometheus text format"""
+        return render_prometheus(self.metrics.items())
+
     async def shutdown(self) -> None:
-        for shard in self.shards:
+        for shard in self.shards.copy():
             if not shard._receive_task or not shard._hb_task or not shard._ws:
-                return
+                continue
 
             _log.info(f'shutting down shard {shard.id}')
 
             shard._receive_task.cancel()
             shard._hb_task.cancel()
-            await shard._ws.close()
+
+            if self.session_store is not None:
+                shard.save_session()
+                # closing with 1000 would invalidate the session we just saved
+                await shard._ws.close(code=4000)
+            else:
+                await shard._ws.close()
+            await shard._dispatcher.close()
             self.shards.remove(shard)
 
             _log.info(f'successfully shutdown shard {shard.id}')
+
+        await self._session.close()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+"""
+Gateway payload decoding.
+
+With msgspec installed, only the envelope (``op``, ``s`` and ``t``) of a payload is decoded up front,
+``d`` is kept as raw JSON until someone asks for it, and known events decode straight into typed Structs.
+Without it, payloads are decoded in full by the active codec.
+"""
+import re
+from typing import Any, NamedTuple
+
+from ..internal import codec, undefined
+from . import etf
+
+__all__ = ['decode_envelope', 'decode_data', 'peek_dispatch']
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class _Envelope(NamedTuple):
+    op: int
+    s: int | None
+    t: str | None
+    d: Any
+
+
+if msgspec is not None:
+
+    class _Payload(msgspec.Struct, kw_only=True):
+        """
+        A typed payload which can still be read like the dict it replaces.
+        """
+
+        def __getitem__(self, key: str) -> Any:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key)
+
+        def __setitem__(self, key: str, value: Any) -> None:
+            setattr(self, key, value)
+
+        def get(self, key: str, default: Any = None) -> Any:
+            value = getattr(self, key, default)
+            return default if value is undefined.UNDEFINED else value
+
+    class UserPayload(_Payload):
+        id: str
+        username: str
+        discriminator: str
+        avatar: str | None
+        bot: bool = undefined.UNDEFINED
+        system: bool = undefined.UNDEFINED
+        mfa_enabled: bool = undefined.UNDEFINED
+        banner: str | None = undefined.UNDEFINED
+        accent_color: int | None = undefined.UNDEFINED
+        locale: str = undefined.UNDEFINED
+        verified: bool = undefined.UNDEFINED
+        email: str | None = undefined.UNDEFINED
+        flags: int = undefined.UNDEFINED
+        premium_type: int = undefined.UNDEFINED
+        public_flags: int = undefined.UNDEFINED
+
+    class ReadyPayload(_Payload):
+        v: int
+        user: UserPayload
+        guilds: list[dict[str, Any]]
+        session_id: str
+        resume_gateway_url: str
+        shard: list[int] | None = None
+        application: dict[str, Any] | None = None
+
+    class _MsgspecEnvelope(msgspec.Struct):
+        op: int
+        s: int | None = None
+        t: str | None = None
+        d: msgspec.Raw = msgspec.Raw()
+
+    TYPES: dict[str, type] = {'READY': ReadyPayload}
+
+    _envelope_decoder = msgspec.json.Decoder(_MsgspecEnvelope)
+    _decoders = {t: msgspec.json.Decoder(payload) for t, payload in TYPES.items()}
+    _decoder = msgspec.json.Decoder()
+
+
+# the order Discord sends the fields of a dispatch in
+_PEEK = re.compile(rb'\{\s*"t":\s*"([A-Z0-9_]+)",\s*"s":\s*(\d+),\s*"op":\s*0\s*,\s*"d":')
+
+
+def peek_dispatch(raw: bytes) -> _Envelope | None:
+    """
+    Read ``t`` and ``s`` of a JSON dispatch without decoding it, ``d`` is left out.
+
+    Only matches the field order Discord sends, returns ``None`` for anything else.
+    """
+    match = _PEEK.match(raw)
+
+    if match is None:
+        return None
+
+    return _Envelope(0, int(match[2]), match[1].decode(), None)
+
+
+def decode_envelope(raw: bytes, encoding: str = 'json') -> _Envelope:
+    """
+    Decode the envelope of a gateway payload, ``d`` is left for :func:`decode_data`.
+    """
+    if encoding == 'etf':
+        data = etf.loads(raw)
+    elif msgspec is not None and codec.name == 'msgspec':
+        return _envelope_decoder.decode(raw)
+    else:
+        data = codec.loads(raw)
+
+    return _Envelope(data.get('op'), data.get('s'), data.get('t'), data.get('d'))
+
+
+def decode_data(t: str | None, d: Any) -> Any:
+    """
+    Decode the ``d`` of an envelope, into a typed payload if one exists for the event `t`.
+    """
+    if msgspec is None or not isinstance(d, msgspec.Raw):
+        return d
+
+    if not d:
+        return None
+
+    try:
+        decoder = _decoders[t]  # type: ignore[index]
+    except KeyError:
+        decoder = _decoder
+
+    return decoder.decode(d)
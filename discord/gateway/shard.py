@@ -21,22 +21,28 @@
 # SOFTWARE
 
 import asyncio
-import json
 import logging
-import zlib
+from concurrent.futures import Executor
 from platform import system
 from random import random
+from time import perf_counter
 from typing import Any
 
 import aiohttp
 from aiohttp import ClientSession, WSMsgType
 
-from ..user import User
+from .. import utils
+from ..internal import codec
+from . import etf, payloads
+from .compression import DECOMPRESSORS, DecompressionError, Decompressor
 from .concurrer import Concurrer
+from .dispatcher import Dispatcher, DispatchPolicy
+from .metrics import ShardMetrics
 from .state import GatewayState
+from .store import SessionInfo, SessionStore
 
-ZLIB_SUFFIX = b'\x00\x00\xff\xff'
-url = '{base}/?v=10&encoding=json&compress=zlib-stream'
+url = '{base}/?v=10&encoding={encoding}&compress={compress}'
+ENCODINGS: tuple[str, ...] = ('json', 'etf')
 _log = logging.getLogger(__name__)
 RESUMABLE: list[int] = [
     4000,
@@ -44,10 +50,9 @@ RESUMABLE: list[int] = [
     4002,
     4003,
     4005,
-    4007,
     4008,
-    4009,
 ]
+_UNWANTED = object()
 __all__ = ['Shard']
 
 
@@ -61,7 +66,19 @@ class Shard:
         state: GatewayState,
         proxy: str | None = None,
         proxy_auth: aiohttp.BasicAuth | None = None,
+        encoding: str = 'json',
+        compress: str = 'zlib-stream',
+        offload_threshold: int | None = None,
+        executor: Executor | None = None,
+        session_store: SessionStore | None = None,
+        dispatch: DispatchPolicy | None = None,
     ) -> None:
+        if encoding not in ENCODINGS:
+            raise ValueError(f'encoding must be one of {ENCODINGS}')
+
+        if compress not in DECOMPRESSORS:
+            raise ValueError(f'compress must be one of {tuple(DECOMPRESSORS)}')
+
         self.token = token
         self.id = shard_id
         self._active_shards = active_shards
@@ -69,10 +86,16 @@ class Shard:
         self._state = state
         self._proxy = proxy
         self._proxy_auth = proxy_auth
+        self.encoding = encoding
+        self.compress = compress
+        # messages at least this large are decompressed and decoded in `executor`, off the event loop
+        self._offload_threshold = offload_threshold
+        self._executor = executor
+        self._session_store = session_store
 
         # non-user made attributes
         self._send_concurrer = Concurrer(110, 60)
-        self._inflator: zlib._Decompress | None = None
+        self._decompressor: Decompressor | None = None
         self._sequence: int | None = None
         self._ws: aiohttp.ClientWebSocketResponse | None = None
         self._resume_gateway_url: str | None = None
@@ -83,103 +106,236 @@ class Shard:
         self._hello_received: asyncio.Future[None] | None = None
         self._hb_task: asyncio.Task[None] | None = None
         self._session_id: str | None = None
-        self._buffer: bytearray | None = None
+        self._hb_sent_at: float | None = None
+        self.metrics = ShardMetrics()
+        self._dispatcher = Dispatcher(self._state.subscriptor.dispatch, dispatch, self.metrics)
 
     async def start(self, resume: bool = False) -> None:
+        if not resume and self._session_id is None and self._session_store is not None:
+            resume = self._restore_session()
+
+        if self._ws is not None:
+            self.metrics.reconnects += 1
+
+        self._dispatcher.start()
+
+        # resuming doesn't count against the session start budget, so do it whenever there's a session to resume
+        if resume and self._session_id is not None:
+            while not await self._connect(resume=True):
+                await asyncio.sleep(30)
+
+            await self.send_resume()
+        else:
+            await self.identify()
+
+    async def _connect(self, resume: bool = False) -> bool:
         self._hello_received = asyncio.Future()
-        self._inflator = zlib.decompressobj()
-        self._buffer = bytearray()
+        self._decompressor = DECOMPRESSORS[self.compress]()
 
         try:
             _log.debug(f'shard:{self.id}: attempting to establish a connection to the Gateway')
-            async with self._state.concurrency:
-                self._ws = await self._session.ws_connect(
-                    url=url.format(base=(self._resume_gateway_url if resume else 'wss://gateway.discord.gg')),
-                    proxy=self._proxy,
-                    proxy_auth=self._proxy_auth,
-                )
+            self._ws = await self._session.ws_connect(
+                url=url.format(
+                    base=(self._resume_gateway_url if resume else 'wss://gateway.discord.gg'),
+                    encoding=self.encoding,
+                    compress=self.compress,
+                ),
+                proxy=self._proxy,
+                proxy_auth=self._proxy_auth,
+            )
             _log.debug(f'shard:{self.id}: successfully established a connection to the Gateway')
         except (aiohttp.ClientConnectionError, aiohttp.ClientConnectorError):
             _log.error(f'shard:{self.id}: failed to establish a connection, retrying in 30 seconds')
-
-            await asyncio.sleep(30)
-            asyncio.create_task(self.start(resume=resume))
-            return
+            return False
 
         self._receive_task = asyncio.create_task(self._receive())
+        return True
 
-        if not resume:
-            await self.identify()
+    def _restore_session(self) -> bool:
+        assert self._session_store is not None
+
+        session = self._session_store.load(self.id)
+
+        if session is None:
+            return False
+
+        # only ever try a saved session once
+        self._session_store.delete(self.id)
+
+        # a resume replays no GUILD_CREATE to fill the cache with, nor a READY to learn who we are from
+        if self._state.cache.enabled or session.user is None:
+            _log.info(f'shard {self.id} identifies rather than resuming session {session.session_id}')
+            return False
+
+        self._session_id = session.session_id
+        self._sequence = session.sequence
+        self._resume_gateway_url = session.resume_gateway_url
+        self._state.user_ready = session.user
+        self._state.user = self._state.impls['user'](session.user, self._state.cache)
+        _log.info(f'shard {self.id} restored session {session.session_id}, resuming')
+        return True
+
+    def save_session(self) -> None:
+        if self._session_store is None or self._session_id is None or self._resume_gateway_url is None:
+            return
+
+        self._session_store.save(
+            self.id, SessionInfo(self._session_id, self._sequence, self._resume_gateway_url, self._state.user_ready)
+        )
 
     async def send(self, data: dict[str, Any]) -> None:
         if self._ws is None:
             raise RuntimeError('WebSocket connection must be established first')
 
         async with self._send_concurrer:
-            d = json.dumps(data)
-            _log.debug(f'shard:{self.id}: sending a message to socket: {d}')
-            await self._ws.send_str(d)
+            if _log.isEnabledFor(logging.DEBUG):
+                _log.debug('shard:%s: sending a message to socket: %s', self.id, utils.LoggedPayload(data))
+            await self._send_raw(data)
+
+    async def _send_raw(self, data: dict[str, Any]) -> None:
+        assert self._ws is not None
+
+        if self.encoding == 'etf':
+            await self._ws.send_bytes(etf.dumps(data))
+        else:
+            await self._ws.send_str(codec.dumps(data).decode())
+
+    def _decode(self, decompressor: Decompressor, data: bytes) -> tuple[Any, Any] | None:
+        metrics = self.metrics
+        started = perf_counter()
+        metrics.bytes_compressed += len(data)
+        raw = decompressor.feed(data)
+
+        if raw is None:
+            return None
+
+        metrics.bytes_decompressed += len(raw)
+
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug('shard:%s: received message %s', self.id, utils.LoggedPayload(raw))
+
+        wanted = self._state.wanted_events
+
+        if self.encoding == 'json':
+            peeked = payloads.peek_dispatch(raw)
+
+            if peeked is not None and peeked.t not in wanted:
+                metrics.events[peeked.t] += 1
+                metrics.decode_time.observe(perf_counter() - started)
+                return peeked, _UNWANTED
+
+        payload = payloads.decode_envelope(raw, self.encoding)
+
+        if payload.op == 0:
+            metrics.events[payload.t] += 1
+
+            # events nobody listens to are never decoded any further than their envelope
+            if payload.t not in wanted:
+                metrics.decode_time.observe(perf_counter() - started)
+                return payload, _UNWANTED
+        elif payload.op not in (9, 10):
+            metrics.decode_time.observe(perf_counter() - started)
+            return payload, None
+
+        d = payloads.decode_data(payload.t, payload.d)
+        metrics.decode_time.observe(perf_counter() - started)
+        return payload, d
 
     async def _receive(self) -> None:
-        if self._ws is None or self._inflator is None or self._buffer is None:
+        if self._ws is None or self._decompressor is None:
             return
 
+        loop = asyncio.get_running_loop()
+        # bound to this connection, a frame still queued in the executor after a reconnect
+        # must not be fed to the next connection's decompressor
+        decompressor = self._decompressor
+
         async for message in self._ws:
             if message.type == WSMsgType.CLOSED:
                 break
-            elif message.type == WSMsgType.BINARY:
-                self._buffer.extend(message.data)
+            elif message.type != WSMsgType.BINARY:
+                continue
+
+            decoded = await self._read_frame(loop, decompressor, message.data)
+
+            if decoded is None:
+                continue
+
+            payload, d = decoded
+            op = payload.op
+
+            if payload.s is not None:
+                self._sequence = payload.s
+
+            if op == 0:
+                await self._dispatch(payload.t, d)
+            elif op == 1:
+                await self._send_raw({'op': 1, 'd': self._sequence})
+            elif op == 10:
+                self._hello(d)
+            elif op == 11:
+                self._heartbeat_ack()
+            elif op == 7:
+                await self._ws.close(code=1002)
+                await self.start(resume=True)
+                return
+            elif op == 9:
+                await self._invalid_session(d)
+                return
 
-                if len(message.data) < 4 or message.data[-4:] != ZLIB_SUFFIX:
-                    continue
+        if self._ws.closed and self._ws.close_code:
+            await self._closed(self._ws.close_code)
 
-                try:
-                    text = self._inflator.decompress(message.data).decode()
-                except (UnicodeDecodeError, zlib.error):
-                    _log.error(f'shard:{self.id}: failed to decode gateway message')
-                    self._buffer.clear()
-                    continue
+    async def _read_frame(
+        self, loop: asyncio.AbstractEventLoop, decompressor: Decompressor, data: bytes
+    ) -> tuple[Any, Any] | None:
+        try:
+            # frames are still decoded one at a time, so the order within a shard is kept
+            if self._offload_threshold is not None and len(data) >= self._offload_threshold:
+                return await loop.run_in_executor(self._executor, self._decode, decompressor, data)
+            return self._decode(decompressor, data)
+        except (DecompressionError, ValueError):
+            _log.error(f'shard:{self.id}: failed to decode gateway message')
+            return None
+
+    async def _dispatch(self, type: str, data: Any) -> None:
+        if data is _UNWANTED:
+            return
 
-                self._buffer.clear()
+        self._process_event(type, data)
+        # may block reading any further while the queue is full, see DispatchPolicy
+        await self._dispatcher.put(type, data)
+        self.metrics.pending_events = self._dispatcher.pending
 
-                _log.debug(f'shard:{self.id}: received message {text}')
+    def _hello(self, data: dict[str, Any]) -> None:
+        self._heartbeat_interval = data['heartbeat_interval'] / 1000
 
-                data = json.loads(text)
+        asyncio.create_task(self._start_heartbeat(jitter=True))
+        if self._hello_received:
+            self._hello_received.set_result(None)
 
-                sequence = data.get('s', str)
-                op = data.get('op')
-                t = data.get('t')
-                d = data.get('d')
+    def _heartbeat_ack(self) -> None:
+        if self._hb_received is None or self._hb_received.done():
+            return
 
-                if sequence != str:
-                    self._sequence = sequence
+        if self._hb_sent_at is not None:
+            self.metrics.latency = perf_counter() - self._hb_sent_at
+            self.metrics.heartbeat_latency.observe(self.metrics.latency)
 
-                if op == 0:
-                    asyncio.create_task(self._process_event(t, d))
-                elif op == 1:
-                    await self._ws.send_str(json.dumps({'op': 1, 'd': self._sequence}))
-                elif op == 10:
-                    self._heartbeat_interval = d['heartbeat_interval'] / 1000
+        self._hb_received.set_result(None)
 
-                    asyncio.create_task(self._start_heartbeat(jitter=True))
-                    if self._hello_received:
-                        self._hello_received.set_result(None)
-                elif op == 11:
-                    if self._hb_received and not self._hb_received.done():
-                        self._hb_received.set_result(None)
+        self._hb_task = asyncio.create_task(self._start_heartbeat())
 
-                        self._hb_task = asyncio.create_task(self._start_heartbeat())
-                elif op == 7:
-                    await self._ws.close(code=1002)
-                    await self.start(resume=True)
-                    return
-                elif op == 9:
-                    await self._ws.close()
-                    await self.start()
-                    return
+    async def _invalid_session(self, resumable: bool) -> None:
+        assert self._ws is not None
+        # close with a non-1000 code, so a resumable session stays alive
+        await self._ws.close(code=4000)
 
-        if self._ws.closed and self._ws.close_code:
-            await self._closed(self._ws.close_code)
+        if resumable:
+            await self.start(resume=True)
+        else:
+            await asyncio.sleep(1 + random() * 4)
+            await self.start()
 
     async def _start_heartbeat(self, jitter: bool = False) -> None:
         if self._heartbeat_interval is None or self._ws is None or self._receive_task is None:
@@ -192,10 +348,11 @@ class Shard:
 
         self._hb_received = asyncio.Future()
 
-        _log.debug(f'shard:{self.id}: sending heartbeat')
+        _log.debug('shard:%s: sending heartbeat', self.id)
 
         try:
-            await self._ws.send_str(json.dumps({'op': 1, 'd': self._sequence}))
+            self._hb_sent_at = perf_counter()
+            await self._send_raw({'op': 1, 'd': self._sequence})
         except ConnectionResetError:
             _log.debug(f'shard:{self.id}: failed to send heartbeat due a connection reset, reconnecting...')
             self._receive_task.cancel()
@@ -204,29 +361,61 @@ class Shard:
             await self.start(bool(self._resume_gateway_url))
             return
 
+        stalls = self._dispatcher.stalls
+
+        while True:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._hb_received), 5)
+                return
+            except asyncio.TimeoutError:
+                # the ACK may be sitting unread behind a full dispatch queue, which says nothing of the connection
+                if self._dispatcher.blocking or self._dispatcher.stalls != stalls:
+                    stalls = self._dispatcher.stalls
+                    continue
+
+                _log.debug(f'shard:{self.id}: heartbeat waiting timed out, reconnecting...')
+                self._receive_task.cancel()
+                if not self._ws.closed:
+                    await self._ws.close(code=1008)
+                await self.start(bool(self._resume_gateway_url))
+                return
+
+    def _process_event(self, type: str, data: dict[str, Any]) -> None:
+        # before dispatching, so subscribers already see the cache updated
         try:
-            await asyncio.wait_for(self._hb_received, 5)
-        except asyncio.TimeoutError:
-            _log.debug(f'shard:{self.id}: heartbeat waiting timed out, reconnecting...')
-            self._receive_task.cancel()
-            if not self._ws.closed:
-                await self._ws.close(code=1008)
-            await self.start(bool(self._resume_gateway_url))
+            self._state.cache.handle(type, data)
+        except Exception:
+            _log.exception(f'shard:{self.id}: failed to update the cache from {type}')
 
-    async def _process_event(self, type: str, data: dict[str, Any]) -> None:
         if type == 'READY':
             self._session_id = data['session_id']
             self._resume_gateway_url = data['resume_gateway_url']
             self._state.user_ready = data['user']
             self._state.user = self._state.impls['user'](data['user'], self._state.cache)
             data['user'] = self._state.user
+            user = self._state.user_ready
             _log.info(
-                f'shard {self.id} is ready: {len(data["guilds"])} guilds on {self._state.user_ready["username"]}#{self._state.user_ready["discriminator"]} (sid: {self._session_id})'
+                f'shard {self.id} is ready: {len(data["guilds"])} guilds on '
+                f'{user["username"]}#{user["discriminator"]} (sid: {self._session_id})'
             )
 
-        asyncio.create_task(self._state.subscriptor.dispatch(type, data))
-
     async def identify(self) -> None:
+        self._session_id = None
+        self._sequence = None
+
+        if self._state.budget is not None:
+            await self._state.budget.acquire()
+
+        # only connect once allowed to identify, rather than sit on an open socket unidentified while waiting
+        while True:
+            async with self._state.concurrency.for_shard(self.id):
+                if await self._connect():
+                    await self._send_identify()
+                    return
+
+            await asyncio.sleep(30)
+
+    async def _send_identify(self) -> None:
         await self.send(
             {
                 'op': 2,
@@ -259,6 +448,7 @@ class Shard:
 
     async def _closed(self, code: int) -> None:
         _log.debug(f'shard:{self.id}: closed with code {code}')
+        self.metrics.close_codes[code] += 1
         if self._hb_task and not self._hb_task.done():
             self._hb_task.cancel()
         if code in RESUMABLE:
@@ -266,8 +456,14 @@ class Shard:
         else:
             if code == 4004:
                 raise RuntimeError('Authentication used in gateway is invalid')
+            elif code == 4010:
+                raise RuntimeError('Shard sent to the gateway is invalid')
             elif code == 4011:
                 raise RuntimeError('Discord is requiring you shard your bot')
+            elif code == 4012:
+                raise RuntimeError('Gateway version is invalid')
+            elif code == 4013:
+                raise RuntimeError('Intents sent to the gateway are invalid')
             elif code == 4014:
                 raise RuntimeError("You aren't allowed to carry a privileged intent wanted")
 
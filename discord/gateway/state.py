@@ -28,23 +28,40 @@ from discord import traits
 from ..cache.core import Cache
 from ..internal import Subscriptor
 from ..user import User
-from .concurrer import Concurrer
+from .concurrer import IdentifyScheduler, SessionBudget, SharedIdentifyScheduler
 
 __all__ = ['GatewayState']
 
+# dispatches the shard itself needs, whether or not anyone subscribed to them
+INTERNAL_EVENTS: frozenset[str] = frozenset({'READY'})
+
 
 class GatewayState:
     user: User
+    concurrency: IdentifyScheduler | SharedIdentifyScheduler
 
     def __init__(
-        self, app: traits.BaseApp, shard_concurrency: tuple[int, int], intents: int, cache: Cache, impls: dict[str, Any]
+        self,
+        app: traits.BaseApp,
+        max_concurrency: int,
+        intents: int,
+        cache: Cache,
+        impls: dict[str, Any],
+        concurrent_dispatch: bool = True,
     ) -> None:
         self.intents = intents
         self.user_ready = None
-        self.subscriptor = Subscriptor(app)
-        self.shard_concurrency = shard_concurrency
+        self.subscriptor = Subscriptor(app, concurrent_dispatch, self.update_wanted_events)
+        self.max_concurrency = max_concurrency
+        self.budget: SessionBudget | None = None
         self.cache = cache
         self.impls = impls
+        self.wanted_events: frozenset[str] = INTERNAL_EVENTS
+        """Dispatches shards decode, every other dispatch is dropped after peeking at its type"""
+        self.update_wanted_events()
+
+    def update_wanted_events(self) -> None:
+        self.wanted_events = INTERNAL_EVENTS | self.cache.events | self.subscriptor.events
 
     def loop_activated(self) -> None:
-        self.concurrency = Concurrer(self.shard_concurrency[0], self.shard_concurrency[1])
+        self.concurrency = IdentifyScheduler(self.max_concurrency)
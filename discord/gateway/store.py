@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+"""
+Stores for shard sessions, so a restarted process can resume instead of identifying.
+"""
+import json
+import os
+import sqlite3
+from typing import Any
+
+from attrs import asdict, define
+
+__all__ = ['SessionInfo', 'SessionStore', 'FileSessionStore', 'SQLiteSessionStore']
+
+
+@define(weakref_slot=False)
+class SessionInfo:
+    session_id: str
+    """
+    The id of the session to resume
+    """
+
+    sequence: int | None
+    """
+    The last sequence number received
+    """
+
+    resume_gateway_url: str
+    """
+    The url the session has to be resumed on
+    """
+
+    user: dict[str, Any] | None = None
+    """
+    The user READY reported, as resuming sends no READY
+    """
+
+
+class SessionStore:
+    """
+    Saves shard sessions on shutdown and hands them back when a shard starts.
+
+    A saved session is only handed back once, a shard which can't resume it identifies as usual.
+    Resuming replays no GUILD_CREATE, so shards of an app caching anything identify rather than resume a saved session,
+    which would leave the cache cold for every guild the session already had.
+    """
+
+    def load(self, shard_id: int) -> SessionInfo | None:
+        raise NotImplementedError
+
+    def save(self, shard_id: int, session: SessionInfo) -> None:
+        raise NotImplementedError
+
+    def delete(self, shard_id: int) -> None:
+        raise NotImplementedError
+
+
+class FileSessionStore(SessionStore):
+    """
+    Keeps one JSON file per shard in `directory`, so separate processes never write the same file.
+    """
+
+    def __init__(self, directory: str = '.sessions') -> None:
+        self.directory = directory
+
+    def _path(self, shard_id: int) -> str:
+        return os.path.join(self.directory, f'shard-{shard_id}.json')
+
+    def load(self, shard_id: int) -> SessionInfo | None:
+        try:
+            with open(self._path(shard_id)) as f:
+                return SessionInfo(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, shard_id: int, session: SessionInfo) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(shard_id)
+
+        # write then rename, so a crash mid-write can't leave a torn file behind
+        with open(path + '.tmp', 'w') as f:
+            json.dump(asdict(session), f)
+        os.replace(path + '.tmp', path)
+
+    def delete(self, shard_id: int) -> None:
+        try:
+            os.remove(self._path(shard_id))
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Keeps sessions in a SQLite database at `path`.
+    """
+
+    def __init__(self, path: str = 'sessions.db') -> None:
+        self.path = path
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # connections can't be shared with forked processes, so each process opens its own
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._pid = os.getpid()
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'shard_id INTEGER PRIMARY KEY, '
+                'session_id TEXT NOT NULL, '
+                'sequence INTEGER, '
+                'resume_gateway_url TEXT NOT NULL, '
+                'user TEXT'
+                ')'
+            )
+            self._connection.commit()
+        return self._connection
+
+    def load(self, shard_id: int) -> SessionInfo | None:
+        row = self.connection.execute(
+            'SELECT session_id, sequence, resume_gateway_url, user FROM sessions WHERE shard_id = ?', (shard_id,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        session_id, sequence, resume_gateway_url, user = row
+        return SessionInfo(session_id, sequence, resume_gateway_url, None if user is None else json.loads(user))
+
+    def save(self, shard_id: int, session: SessionInfo) -> None:
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)',
+                (
+                    shard_id,
+                    session.session_id,
+                    session.sequence,
+                    session.resume_gateway_url,
+                    None if session.user is None else json.dumps(session.user),
+                ),
+            )
+
+    def delete(self, shard_id: int) -> None:
+        with self.connection:
+            self.connection.execute('DELETE FROM sessions WHERE shard_id = ?', (shard_id,))
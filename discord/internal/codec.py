@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+"""
+The JSON codec used for the Gateway and REST.
+
+The fastest available implementation is picked on import: msgspec, then orjson, then the stdlib.
+"""
+import json
+from typing import Any, Callable
+
+__all__ = ['dumps', 'loads', 'name', 'set_codec']
+
+Dumps = Callable[[Any], bytes]
+Loads = Callable[[bytes | str], Any]
+
+
+def _stdlib() -> tuple[Dumps, Loads]:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+    return dumps, json.loads
+
+
+def _orjson() -> tuple[Dumps, Loads]:
+    import orjson
+
+    return orjson.dumps, orjson.loads
+
+
+def _msgspec() -> tuple[Dumps, Loads]:
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+    return encoder.encode, decoder.decode
+
+
+CODECS: dict[str, Callable[[], tuple[Dumps, Loads]]] = {
+    'msgspec': _msgspec,
+    'orjson': _orjson,
+    'json': _stdlib,
+}
+
+name: str
+dumps: Dumps
+loads: Loads
+
+
+def set_codec(codec: str) -> None:
+    """
+    Switch to a specific codec, one of ``'msgspec'``, ``'orjson'`` or ``'json'``.
+
+    Raises :exc:`ImportError` if it isn't installed.
+    """
+    global name, dumps, loads
+
+    try:
+        factory = CODECS[codec]
+    except KeyError:
+        raise ValueError(f'Unknown codec {codec!r}')
+
+    dumps, loads = factory()
+    name = codec
+
+
+for _codec in CODECS:
+    try:
+        set_codec(_codec)
+    except ImportError:
+        continue
+    break
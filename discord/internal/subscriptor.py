@@ -20,6 +20,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE
 
+import asyncio
+import logging
 from typing import Any, Callable, Coroutine, Type
 
 from attrs import define
@@ -29,6 +31,7 @@ from discord import traits
 from ..events.base import BaseEvent
 
 AsyncFunc = Callable[..., Coroutine[Any, Any, Any]]
+_log = logging.getLogger(__name__)
 
 
 @define(weakref_slot=False)
@@ -50,12 +53,38 @@ class Subscription:
 
 
 class Subscriptor:
-    def __init__(self, app: traits.BaseApp) -> None:
+    def __init__(
+        self,
+        app: traits.BaseApp,
+        concurrent: bool = True,
+        on_change: Callable[[], None] | None = None,
+    ) -> None:
         self.subscriptions: list[Subscription] = []
         self.app = app
+        self.concurrent = concurrent
+        """Whether the callbacks of one event run concurrently, instead of one after another"""
+        self.on_change = on_change
+        """Called after a subscription was added or removed, so the events wanted can be recomputed"""
+        # subscriptions by the Discord event name they're for, e.g. MESSAGE_CREATE.
+        # tuples are swapped out rather than mutated, so a dispatch in progress isn't affected
+        self._index: dict[str, tuple[Subscription, ...]] = {}
+
+    @property
+    def events(self) -> frozenset[str]:
+        """The Discord events with at least one subscription"""
+        return frozenset(self._index)
+
+    @staticmethod
+    def _event_name(type: str) -> str:
+        return type.removeprefix('on_').upper()
 
     def add_subscription(self, subscription: Subscription) -> None:
         self.subscriptions.append(subscription)
+        name = self._event_name(subscription.type)
+        self._index[name] = (*self._index.get(name, ()), subscription)
+
+        if self.on_change is not None:
+            self.on_change()
 
     def remove_subscription(self, subscription: Subscription) -> None:
         try:
@@ -63,9 +92,40 @@ class Subscriptor:
         except ValueError:
             raise ValueError('Subscription is dormant')
 
-    async def dispatch(self, event_name: str, event_data: dict[str, Any]):
-        name = 'on_' + event_name.lower()
+        name = self._event_name(subscription.type)
+        subs = tuple(sub for sub in self._index[name] if sub is not subscription)
+
+        if subs:
+            self._index[name] = subs
+        else:
+            del self._index[name]
+
+        if self.on_change is not None:
+            self.on_change()
+
+    async def dispatch(self, event_name: str, event_data: dict[str, Any]) -> None:
+        subs = self._index.get(event_name)
+
+        if subs is None:
+            return
+
+        # every subscription to the same event class gets the same event object
+        events: dict[Type[BaseEvent], BaseEvent] = {}
+
+        for sub in subs:
+            if sub.event_class not in events:
+                events[sub.event_class] = sub.event_class.construct(app=self.app, data=event_data)
+
+        if not self.concurrent or len(subs) == 1:
+            for sub in subs:
+                await sub.callback(events[sub.event_class])
+            return
+
+        results = await asyncio.gather(
+            *(sub.callback(events[sub.event_class]) for sub in subs),
+            return_exceptions=True,
+        )
 
-        for sub in self.subscriptions:
-            if sub.type == name:
-                await sub.callback(sub.event_class.construct(app=self.app, data=event_data))
+        for sub, result in zip(subs, results):
+            if isinstance(result, Exception):
+                _log.error(f'subscription {sub.callback.__qualname__} to {event_name} failed', exc_info=result)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+from datetime import datetime
+from typing import Any
+
+from .internal import undefined
+
+_OPTIONAL: tuple[str, ...] = (
+    'nick',
+    'avatar',
+    'premium_since',
+    'deaf',
+    'mute',
+    'flags',
+    'pending',
+    'communication_disabled_until',
+)
+_TIMESTAMPS: frozenset[str] = frozenset({'premium_since', 'communication_disabled_until'})
+
+
+def _timestamp(value: str | None) -> datetime | None:
+    return None if value is None else datetime.fromisoformat(value)
+
+
+class Member:
+    """
+    A guild member as the cache keeps it, its user lives in the user store under `user_id`.
+    """
+
+    __slots__ = ('user_id', 'roles', 'joined_at', *_OPTIONAL)
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        self.user_id = int(data['user']['id'])
+        self.joined_at = _timestamp(data.get('joined_at'))
+        self.update(data)
+
+    def update(self, data: dict[str, Any]) -> None:
+        roles = data.get('roles')
+        if roles is not None:
+            # most members have no roles, and every empty tuple is the same object
+            self.roles = tuple(int(role) for role in roles)
+
+        for name in _OPTIONAL:
+            if name not in data:
+                continue
+
+            value = data[name]
+
+            if name in _TIMESTAMPS:
+                value = _timestamp(value)
+
+            setattr(self, name, value)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in _OPTIONAL:
+            return undefined.UNDEFINED
+        elif name == 'roles':
+            return ()
+
+        raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
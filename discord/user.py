@@ -19,31 +19,56 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE
+import sys
+from typing import Any
+
 from discord_typings import UserData
 
 from .cache import Cache
 from .internal import undefined
 
+# left unset when Discord doesn't send them, reading them then gives UNDEFINED
+_OPTIONAL: tuple[str, ...] = (
+    'bot',
+    'system',
+    'mfa_enabled',
+    'banner',
+    'accent_color',
+    'locale',
+    'verified',
+    'email',
+    'flags',
+    'premium_type',
+    'public_flags',
+)
+
 
 class User:
+    __slots__ = ('_cache', 'id', 'username', 'discriminator', 'avatar', *_OPTIONAL)
+
     def __init__(self, data: UserData, cache: Cache) -> None:
         self._cache = cache
 
-        self.id = data['id']
+        self.id = int(data['id'])
         self.username = data['username']
-        self.discriminator = data['discriminator']
+        self.discriminator = sys.intern(data['discriminator'])
         self.avatar = data['avatar']
-        self.bot = data.get('bot', undefined.UNDEFINED)
-        self.system = data.get('system', undefined.UNDEFINED)
-        self.mfa_enabled = data.get('mfa_enabled', undefined.UNDEFINED)
-        self.banner = data.get('banner', undefined.UNDEFINED)
-        self.accent_color = data.get('accent_color', undefined.UNDEFINED)
-        self.locale = data.get('locale', undefined.UNDEFINED)
-        self.verified = data.get('verified', undefined.UNDEFINED)
-        self.email = data.get('email', undefined.UNDEFINED)
-        self.flags = data.get('flags', undefined.UNDEFINED)
-        self.premium_type = data.get('premium_type', undefined.UNDEFINED)
-        self.public_flags = data.get('public_flags', undefined.UNDEFINED)
+
+        for name in _OPTIONAL:
+            value = data.get(name, undefined.UNDEFINED)
+
+            if value is not undefined.UNDEFINED:
+                setattr(self, name, value)
+
+        locale = data.get('locale')
+        if locale is not None:
+            self.locale = sys.intern(locale)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in _OPTIONAL:
+            return undefined.UNDEFINED
+
+        raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
 
     @property
     def name(self) -> str:
@@ -24,8 +24,42 @@ from typing import Any
 
 from aiohttp import ClientResponse
 
+from .internal import codec
+
+_payload_limit: int | None = None
+
 
 async def _text_or_json(cr: ClientResponse) -> None | dict[str, Any]:
     if cr.content_type == 'application/json':
-        return await cr.json(encoding='utf-8')
+        return codec.loads(await cr.read())
     return None
+
+
+def set_debug_payload_limit(limit: int | None) -> None:
+    """
+    Truncate payloads logged at DEBUG to `limit` characters, or log them whole with ``None``.
+    """
+    global _payload_limit
+    _payload_limit = limit
+
+
+class LoggedPayload:
+    """
+    Wraps a payload passed to a logging call, so it's only formatted once a handler emits it.
+    """
+
+    __slots__ = ('payload',)
+
+    def __init__(self, payload: Any) -> None:
+        self.payload = payload
+
+    def __str__(self) -> str:
+        if isinstance(self.payload, (bytes, bytearray, memoryview)):
+            text = bytes(self.payload).decode(errors='replace')
+        else:
+            text = str(self.payload)
+
+        if _payload_limit is not None and len(text) > _payload_limit:
+            return f'{text[:_payload_limit]}... ({len(text) - _payload_limit} more characters)'
+
+        return text
@@ -33,6 +33,7 @@ packages = [
     'discord',
     'discord.api',
     'discord.apps',
+    'discord.cache',
     'discord.events',
     'discord.traits',
     'discord.gateway',
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import asyncio
+import logging
+import os
+import socket
+import stat
+import time
+
+import pytest
+
+from discord.api.backends import BrokerBackend, RateLimitBroker
+from discord.api.route import Route
+
+
+def test_unreachable_broker_is_retried_sparingly(tmp_path, caplog: pytest.LogCaptureFixture) -> None:
+    backend = BrokerBackend(str(tmp_path / 'missing.sock'))
+    route = Route('/gateway')
+
+    async def main() -> None:
+        for _ in range(20):
+            await backend.acquire('GET', route)
+            await backend.update('GET', route, {})
+
+    with caplog.at_level(logging.WARNING, logger='discord.api.backends'):
+        asyncio.run(main())
+
+    assert len(caplog.records) == 1
+
+
+def test_update_and_lock_fall_back_when_the_broker_drops() -> None:
+    backend = BrokerBackend()
+    route = Route('/gateway')
+    headers = {
+        'X-RateLimit-Bucket': 'abc',
+        'X-RateLimit-Limit': '5',
+        'X-RateLimit-Remaining': '4',
+        'X-RateLimit-Reset-After': '1',
+    }
+
+    async def connect() -> bool:
+        return True
+
+    async def send(data: dict) -> None:
+        raise ConnectionResetError
+
+    backend._connect = connect  # type: ignore[method-assign]
+    backend._send = send  # type: ignore[method-assign]
+
+    async def main() -> None:
+        await backend.update('GET', route, headers)
+        await backend.lock('GET', route, 0.01, False)
+
+    asyncio.run(main())
+
+    assert backend._fallback.rate_limiter._buckets
+
+
+def test_clients_share_buckets_through_the_broker(tmp_path) -> None:
+    path = str(tmp_path / 'broker.sock')
+    route = Route('/channels/{channel_id}/messages', channel_id=1)
+    headers = {
+        'X-RateLimit-Bucket': 'abc',
+        'X-RateLimit-Limit': '1',
+        'X-RateLimit-Remaining': '0',
+        'X-RateLimit-Reset-After': '0.3',
+    }
+
+    async def main() -> float:
+        broker = RateLimitBroker(path)
+        await broker.start()
+        first, second = BrokerBackend(path), BrokerBackend(path)
+
+        try:
+            await first.acquire('POST', route)
+            await first.update('POST', route, headers)
+            await asyncio.sleep(0.05)
+
+            start = time.perf_counter()
+            await second.acquire('POST', route)
+            return time.perf_counter() - start
+        finally:
+            await first.close()
+            await second.close()
+            await broker.close()
+
+    waited = asyncio.run(main())
+
+    # the second client waited for the bucket the first one exhausted
+    assert 0.2 <= waited < 1
+    assert not os.path.exists(path)
+
+
+def test_broker_socket_is_private(tmp_path) -> None:
+    path = str(tmp_path / 'broker.sock')
+
+    async def main() -> int:
+        broker = RateLimitBroker(path)
+        await broker.start()
+
+        try:
+            return os.stat(path).st_mode
+        finally:
+            await broker.close()
+
+    assert stat.S_IMODE(asyncio.run(main())) == 0o600
+
+
+def test_broker_refuses_a_live_socket_and_replaces_a_stale_one(tmp_path) -> None:
+    path = str(tmp_path / 'broker.sock')
+
+    # left behind by a broker which didn't shut down cleanly
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+
+    async def main() -> None:
+        broker = RateLimitBroker(path)
+        await broker.start()
+
+        try:
+            with pytest.raises(RuntimeError):
+                await RateLimitBroker(path).start()
+        finally:
+            await broker.close()
+
+    asyncio.run(main())
+
+
+def test_broker_does_not_remove_other_files(tmp_path) -> None:
+    path = tmp_path / 'broker.sock'
+    path.write_text('data')
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(RateLimitBroker(str(path)).start())
+
+    assert path.read_text() == 'data'
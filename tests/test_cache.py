@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import pytest
+
+from discord.apps.gateway import GatewayApp, impls
+from discord.cache import core
+from discord.cache.columnar import ColumnarMemberStore
+from discord.cache.core import Cache, Store, StorePolicy
+
+
+def test_unsupported_member_policy_fails_at_construction() -> None:
+    with pytest.raises(ValueError):
+        Cache({'member_store': ColumnarMemberStore}, {'members': StorePolicy(max_entries=100)})
+
+
+def test_supported_member_policy() -> None:
+    cache = Cache({'member_store': ColumnarMemberStore}, {'members': StorePolicy()})
+
+    assert cache.members == {}
+
+
+def test_store_evicts_least_recently_used() -> None:
+    store: Store[str] = Store(StorePolicy(max_entries=2))
+    store.upsert(1, 'a')
+    store.upsert(2, 'b')
+
+    # reading 1 makes 2 the least recently used
+    assert store.get(1) == 'a'
+    store.upsert(3, 'c')
+
+    assert list(store) == [1, 3]
+    assert store.get(2) is None
+    assert store.evictions == 1
+
+
+def test_store_expires_after_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(core.time, 'monotonic', lambda: now[0])
+    store: Store[str] = Store(StorePolicy(ttl=10))
+    store.upsert(1, 'a')
+    now[0] = 105.0
+    store.upsert(2, 'b')
+
+    now[0] = 109.0
+    assert store.get(1) == 'a'
+
+    now[0] = 110.0
+    assert store.get(1) is None
+    assert 2 in store
+    assert store.expirations == 1
+
+    # upserts expire the front of the store too
+    now[0] = 116.0
+    store.upsert(3, 'c')
+    assert list(store) == [3]
+    assert store.expirations == 2
+
+
+def test_disabled_store_caches_nothing() -> None:
+    store: Store[str] = Store(StorePolicy(enabled=False))
+    store.upsert(1, 'a')
+
+    assert len(store) == 0
+
+
+def test_stats_report_evictions_and_expirations(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [0.0]
+    monkeypatch.setattr(core.time, 'monotonic', lambda: now[0])
+    cache = Cache(
+        {'member_store': ColumnarMemberStore},
+        {'users': StorePolicy(max_entries=1), 'messages': StorePolicy(ttl=1)},
+    )
+    cache.users.upsert(1, object())
+    cache.users.upsert(2, object())
+    cache.messages.upsert(1, object())
+    now[0] = 2.0
+    cache.messages.get(1)
+
+    stats = cache.stats()
+
+    assert stats['users'] == {'entities': 1, 'evictions': 1, 'expirations': 0}
+    assert stats['messages'] == {'entities': 0, 'evictions': 0, 'expirations': 1}
+    assert stats['guilds'] == {'entities': 0, 'evictions': 0, 'expirations': 0}
+
+
+def _user(id: int) -> dict:
+    return {'id': str(id), 'username': f'user{id}', 'discriminator': '0001', 'avatar': None}
+
+
+def _guild() -> dict:
+    return {
+        'id': '1',
+        'name': 'guild',
+        'roles': [{'id': '10', 'name': 'role'}],
+        'channels': [{'id': '100', 'type': 0}, {'id': '101', 'type': 2}],
+        'threads': [{'id': '102', 'type': 11, 'guild_id': '1'}],
+        'members': [
+            {'user': _user(1000), 'roles': ['10'], 'nick': 'one', 'joined_at': '2022-01-01T00:00:00+00:00'},
+            {'user': _user(1001), 'roles': [], 'joined_at': '2022-01-01T00:00:00+00:00'},
+        ],
+        'presences': [{'user': {'id': '1000'}, 'status': 'online'}],
+    }
+
+
+def test_guild_create_fills_every_store() -> None:
+    cache = Cache(impls)
+    cache.handle('GUILD_CREATE', _guild())
+
+    guild = cache.get_guild(1)
+    assert guild is not None
+    assert guild['roles'] == {10: {'id': '10', 'name': 'role'}}
+    # kept in their own stores rather than on the guild
+    assert 'channels' not in guild and 'members' not in guild
+    assert cache.channels_by_guild == {1: {100, 101, 102}}
+    assert sorted(channel['id'] for channel in cache.get_guild_channels(1)) == ['100', '101', '102']
+    assert cache.get_member(1, 1000).nick == 'one'
+    assert cache.get_user(1001).username == 'user1001'
+    # presences are opt-in
+    assert cache.presences == {}
+
+
+def test_guild_update_and_delete() -> None:
+    cache = Cache(impls)
+    cache.handle('GUILD_CREATE', _guild())
+    cache.handle('GUILD_UPDATE', {'id': '1', 'name': 'renamed', 'roles': [{'id': '11', 'name': 'other'}]})
+
+    guild = cache.get_guild(1)
+    assert guild is not None
+    assert guild['name'] == 'renamed'
+    assert list(guild['roles']) == [11]
+
+    # an outage keeps everything around
+    cache.handle('GUILD_DELETE', {'id': '1', 'unavailable': True})
+    assert cache.get_guild(1)['unavailable'] is True  # type: ignore[index]
+    assert cache.get_member(1, 1000) is not None
+
+    cache.handle('GUILD_DELETE', {'id': '1'})
+    assert cache.get_guild(1) is None
+    assert cache.get_member(1, 1000) is None
+    assert cache.get_channel(100) is None
+    assert cache.channels_by_guild == {}
+
+
+def test_guild_member_update_merges() -> None:
+    cache = Cache(impls)
+    cache.handle('GUILD_CREATE', _guild())
+    member = cache.get_member(1, 1000)
+
+    cache.handle('GUILD_MEMBER_UPDATE', {'guild_id': '1', 'user': _user(1000), 'roles': ['10', '11']})
+
+    # updated in place, fields the update left out are kept
+    assert cache.get_member(1, 1000) is member
+    assert member.roles == (10, 11)
+    assert member.nick == 'one'
+    assert member.joined_at.year == 2022
+
+    cache.handle('GUILD_MEMBER_UPDATE', {'guild_id': '1', 'user': _user(1002), 'roles': []})
+    assert cache.get_member(1, 1002) is not None
+
+
+def test_guild_member_remove() -> None:
+    cache = Cache(impls)
+    cache.handle('GUILD_CREATE', _guild())
+    cache.handle('GUILD_MEMBER_REMOVE', {'guild_id': '1', 'user': _user(1000)})
+    # for a guild that isn't cached
+    cache.handle('GUILD_MEMBER_REMOVE', {'guild_id': '2', 'user': _user(1000)})
+
+    assert cache.get_member(1, 1000) is None
+    assert cache.get_member(1, 1001) is not None
+    assert len(cache.get_guild_members(1)) == 1  # type: ignore[arg-type]
+
+
+def test_channel_and_thread_events_maintain_the_guild_index() -> None:
+    cache = Cache(impls)
+    cache.handle('GUILD_CREATE', _guild())
+
+    cache.handle('CHANNEL_CREATE', {'id': '103', 'type': 0, 'guild_id': '1'})
+    cache.handle('THREAD_CREATE', {'id': '104', 'type': 11, 'guild_id': '1'})
+    cache.handle('CHANNEL_UPDATE', {'id': '100', 'type': 0, 'guild_id': '1', 'name': 'general'})
+    cache.handle('THREAD_UPDATE', {'id': '102', 'type': 11, 'guild_id': '1', 'archived': True})
+    assert cache.channels_by_guild[1] == {100, 101, 102, 103, 104}
+    assert cache.get_channel(100)['name'] == 'general'  # type: ignore[index]
+    assert cache.get_channel(102)['archived'] is True  # type: ignore[index]
+
+    cache.handle('CHANNEL_DELETE', {'id': '101', 'type': 2, 'guild_id': '1'})
+    cache.handle('THREAD_DELETE', {'id': '104', 'type': 11, 'guild_id': '1'})
+    assert cache.channels_by_guild[1] == {100, 102, 103}
+    assert cache.get_channel(101) is None
+
+    # DMs have no guild
+    cache.handle('CHANNEL_CREATE', {'id': '200', 'type': 1})
+    assert cache.get_channel(200) is not None
+    assert set(cache.channels_by_guild) == {1}
+
+
+def test_store_policies_decide_the_events() -> None:
+    assert 'MESSAGE_CREATE' not in Cache(impls).events
+
+    app = GatewayApp(0, cache_policies={'messages': StorePolicy(max_entries=10)})
+    cache = app._state.cache
+    assert core.CORE_EVENTS | core.STORE_EVENTS['messages'] == cache.events
+    assert cache.events <= app._state.wanted_events
+    assert 'PRESENCE_UPDATE' not in app._state.wanted_events
+
+    cache.handle('MESSAGE_CREATE', {'id': '5', 'content': 'hi'})
+    cache.handle('MESSAGE_UPDATE', {'id': '5', 'content': 'edited'})
+    assert cache.get_message(5)['content'] == 'edited'  # type: ignore[index]
+
+    # not handled while the presence store is disabled
+    cache.handle('PRESENCE_UPDATE', {'guild_id': '1', 'user': {'id': '1000'}, 'status': 'idle'})
+    assert cache.presences == {}
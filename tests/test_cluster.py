@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import asyncio
+import os
+import pickle
+from multiprocessing.connection import Connection
+from typing import Any
+
+import pytest
+
+from discord import GatewayApp, StorePolicy
+from discord.events.base import GatewayEvent
+from discord.gateway import cluster
+from discord.gateway.cluster import ClusterOrchestrator
+from discord.gateway.concurrer import SessionBudget
+from discord.gateway.metrics import ShardMetrics
+from discord.internal.subscriptor import Subscription
+
+
+class _App:
+    """Stands in for a GatewayApp in the workers, crashing the first time each one starts"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    async def _start_worker(
+        self, token: str, shards: list[int], concurrency: Any, budget: Any, connection: Connection
+    ) -> None:
+        marker = os.path.join(self.directory, f'worker-{shards[0]}')
+        restarted = os.path.exists(marker)
+
+        with open(marker, 'a') as f:
+            f.write('started\n')
+
+        if not restarted:
+            raise RuntimeError('crashing on purpose')
+
+        # shared with the cluster
+        await budget.acquire()
+
+        metrics = {}
+        for shard_id in shards:
+            metrics[shard_id] = ShardMetrics()
+            metrics[shard_id].latency = 0.1 * (shard_id + 1)
+        connection.send(metrics)
+
+        await asyncio.Future()
+
+
+def test_workers_are_restarted_and_report_metrics(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cluster, 'SUPERVISE_INTERVAL', 0.1)
+
+    async def main() -> tuple[dict[int, ShardMetrics], float | None, str, list[Any], int]:
+        budget = SessionBudget(1000, 1000, 86400.0, shared=True)
+        app = _App(str(tmp_path))
+        orchestrator = ClusterOrchestrator(app, 'token', [0, 1, 2, 3], 2, restart_delay=0.1, budget=budget)
+        await orchestrator.orchestrate()
+
+        for _ in range(300):
+            await asyncio.sleep(0.1)
+
+            if len(orchestrator.metrics) == 4:
+                break
+
+        metrics = orchestrator.metrics
+        latency = orchestrator.latency
+        text = orchestrator.prometheus()
+        await orchestrator.shutdown()
+        return metrics, latency, text, orchestrator.workers, budget.remaining
+
+    metrics, latency, text, workers, budget_left = asyncio.run(main())
+
+    assert sorted(metrics) == [0, 1, 2, 3]
+    assert latency is not None and abs(latency - 0.25) < 1e-9
+    assert 'discord_shard_latency{shard="3"} 0.4' in text
+    assert workers == [None, None]
+    assert budget_left == 998
+
+    for worker in ('worker-0', 'worker-1'):
+        with open(tmp_path / worker) as f:
+            assert f.read().splitlines() == ['started', 'started']
+
+
+async def _on_message(event: GatewayEvent) -> None:
+    ...
+
+
+def test_app_is_rebuilt_from_its_arguments_and_subscriptions() -> None:
+    app = GatewayApp(512, shards=[0, 1], processes=2, cache_policies={'messages': StorePolicy(max_entries=10)})
+    app._state.subscriptor.add_subscription(Subscription(GatewayEvent, type='on_message_create', callback=_on_message))
+
+    rebuilt = pickle.loads(pickle.dumps(app))
+
+    assert rebuilt.shards == [0, 1]
+    assert rebuilt._intents == 512
+    assert rebuilt._state.cache.policies['messages'].max_entries == 10
+    assert [sub.callback for sub in rebuilt._state.subscriptor.subscriptions] == [_on_message]
+    assert 'MESSAGE_CREATE' in rebuilt._state.wanted_events
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import sys
+from typing import Any
+
+import pytest
+
+from discord.cache.columnar import ColumnarMemberStore, MemberView
+from discord.internal import undefined
+from discord.member import Member
+
+
+def _member(user_id: int, roles: list[int] | tuple[int, ...] = (), **fields: Any) -> Member:
+    data = {'user': {'id': str(user_id)}, 'roles': [str(role) for role in roles], 'joined_at': None}
+    return Member({**data, **fields})
+
+
+def _check_index(store: ColumnarMemberStore) -> None:
+    assert len(store._ids) == len(store._rows)
+    for user_id, row in store._rows.items():
+        assert store._ids[row] == user_id
+        start, count = store._role_start[row], store._role_count[row]
+        assert list(store._role_owners[start : start + count]) == [user_id] * count
+
+
+def test_delete_moves_the_last_row_into_the_gap() -> None:
+    store = ColumnarMemberStore()
+    for user_id in range(1, 6):
+        store.upsert(user_id, _member(user_id, [user_id * 10], nick=f'nick{user_id}'))
+
+    deleted = store.delete(2)
+
+    assert deleted is not None and deleted.roles == (20,) and deleted.nick == 'nick2'
+    assert store.delete(2) is None
+    assert sorted(store) == [1, 3, 4, 5]
+    assert store._rows[5] == 1
+    _check_index(store)
+
+    for user_id in (1, 3, 4, 5):
+        member = store.get(user_id)
+        assert member is not None
+        assert member.roles == (user_id * 10,)
+        assert member.nick == f'nick{user_id}'
+
+    # the last row itself
+    store.delete(5)
+    store.delete(1)
+    assert sorted(store) == [3, 4]
+    _check_index(store)
+    assert store.with_role(20) == []
+    assert store.with_role(40) == [4]
+
+
+def test_roles_are_compacted_after_many_removals() -> None:
+    store = ColumnarMemberStore()
+    for user_id in range(1, 1001):
+        store.upsert(user_id, _member(user_id, [1, 2, 3]))
+
+    for user_id in range(1, 400):
+        store.delete(user_id)
+
+    # 1197 of 3000 slots released, not yet half
+    assert len(store._roles) == 3000
+    assert store._released == 1197
+
+    # only upserts compact, each releasing three slots more
+    for user_id in range(400, 700):
+        store.upsert(user_id, _member(user_id, [4]))
+
+    assert len(store._roles) < 3000
+    assert store._released * 2 <= len(store._roles)
+    _check_index(store)
+    assert store.get(500).roles == (4,)  # type: ignore[union-attr]
+    assert store.get(800).roles == (1, 2, 3)  # type: ignore[union-attr]
+    assert sorted(store.with_role(4)) == list(range(400, 700))
+    assert sorted(store.with_role(1)) == list(range(700, 1001))
+
+
+def test_with_role_only_matches_whole_role_ids() -> None:
+    role = 0x0123456789ABCDEF
+    raw = role.to_bytes(8, sys.byteorder)
+    # two role ids whose bytes spell out `role` across the boundary between them
+    head = int.from_bytes(bytes(4) + raw[:4], sys.byteorder)
+    tail = int.from_bytes(raw[4:] + bytes(4), sys.byteorder)
+
+    store = ColumnarMemberStore()
+    store.upsert(1, _member(1, [head, tail]))
+    store.upsert(2, _member(2, [7, role]))
+    store.upsert(3, _member(3, [role]))
+    assert role.to_bytes(8, sys.byteorder) in store._roles.tobytes()[4:12]
+
+    assert store.with_role(role) == [2, 3]
+    assert store.with_role(head) == [1]
+
+    # released slots still hold the role, but nobody owns them
+    store.upsert(2, _member(2, [7]))
+    assert store.with_role(role) == [3]
+
+
+def test_member_view_reads_the_current_columns() -> None:
+    store = ColumnarMemberStore()
+    store.upsert(1, _member(1, [10], nick='before', joined_at='2022-01-01T00:00:00+00:00'))
+    view = store.get(1)
+    assert isinstance(view, MemberView)
+
+    view.update({'roles': ['10', '11'], 'nick': None, 'deaf': True})
+    store.upsert(2, _member(2, [12]))
+    store.delete(2)
+
+    assert view.roles == (10, 11)
+    assert view.nick is None
+    assert view.deaf is True
+    assert view.joined_at.year == 2022  # type: ignore[union-attr]
+    # fields left at their default take no space
+    assert 1 not in store._fields['nick']
+
+    store.upsert(1, _member(1, [], nick='after'))
+    assert view.roles == ()
+    assert view.nick == 'after'
+    assert view.deaf is False
+
+    store.delete(1)
+    with pytest.raises(LookupError):
+        view.roles
+
+
+def test_unset_fields_read_as_their_default() -> None:
+    store = ColumnarMemberStore()
+    member = _member(1)
+    assert member.nick is undefined.UNDEFINED
+
+    store.upsert(1, member)
+
+    assert store.get(1).nick is None  # type: ignore[union-attr]
+    with pytest.raises(AttributeError):
+        store.get(1).unknown  # type: ignore[union-attr]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import json
+import random
+import zlib
+
+from discord.gateway.compression import ZLIB_SUFFIX, ZlibStreamDecompressor
+
+
+def _record(payloads: list[bytes]) -> list[bytes]:
+    # how Discord sends a zlib-stream: one shared context, flushed after every payload
+    compressor = zlib.compressobj()
+    return [compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH) for payload in payloads]
+
+
+def _fragment(message: bytes, rng: random.Random) -> list[bytes]:
+    points = {rng.randrange(1, len(message)) for _ in range(rng.randrange(0, 6)) if len(message) > 1}
+
+    # always split inside of the suffix on some messages
+    if len(message) > len(ZLIB_SUFFIX) and rng.random() < 0.5:
+        points.add(len(message) - rng.randrange(1, len(ZLIB_SUFFIX)))
+
+    points = sorted(points)
+    return [message[start:end] for start, end in zip([0, *points], [*points, len(message)])]
+
+
+def test_fragmented_replay() -> None:
+    rng = random.Random(1234)
+    payloads = [
+        json.dumps({'op': 0, 's': n, 't': 'MESSAGE_CREATE', 'd': {'content': 'x' * rng.randrange(0, 20000)}}).encode()
+        for n in range(300)
+    ]
+    decompressor = ZlibStreamDecompressor()
+    received: list[bytes] = []
+
+    for message in _record(payloads):
+        fragments = _fragment(message, rng)
+
+        for fragment in fragments[:-1]:
+            assert decompressor.feed(fragment) is None
+
+        payload = decompressor.feed(fragments[-1])
+        assert payload is not None
+        received.append(payload)
+
+    assert received == payloads
+
+
+def test_suffix_split_byte_by_byte() -> None:
+    payload = b'{"op":11,"d":null}'
+    message = _record([payload])[0]
+    decompressor = ZlibStreamDecompressor()
+
+    for byte in message[:-1]:
+        assert decompressor.feed(bytes([byte])) is None
+
+    assert decompressor.feed(message[-1:]) == payload
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import asyncio
+import time
+from typing import Any
+
+import pytest
+
+from discord import GatewayApp
+from discord.gateway.concurrer import SessionBudget, project_boot
+from discord.gateway.shard import Shard
+
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_budget_keeps_the_reserve(shared: bool) -> None:
+    budget = SessionBudget(1000, 3, 3600.0, reserve=1, shared=shared)
+
+    assert budget._take() == 0
+    assert budget._take() == 0
+    assert budget.remaining == 1
+    # refused, the last session start is held back
+    assert 3590 < budget._take() <= 3600
+    assert budget.remaining == 1
+
+
+def test_acquire_waits_for_the_reset() -> None:
+    budget = SessionBudget(10, 1, 0.2, reserve=1)
+
+    async def main() -> float:
+        started = time.monotonic()
+        await asyncio.wait_for(budget.acquire(), 5)
+        return time.monotonic() - started
+
+    waited = asyncio.run(main())
+
+    assert 0.15 < waited < 1
+    # reset to the total, minus the start just taken
+    assert budget.remaining == 9
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.connects = 0
+
+    async def ws_connect(self, **kwargs: Any) -> None:
+        self.connects += 1
+        raise AssertionError('connected without a session start')
+
+
+def test_identify_is_delayed_once_the_budget_hits_the_reserve() -> None:
+    async def main() -> int:
+        app = GatewayApp(0)
+        app._state.loop_activated()
+        app._state.budget = SessionBudget(1000, 2, 3600.0, reserve=2)
+        session = _Session()
+        shard = Shard('token', 0, 1, session, app._state)  # type: ignore[arg-type]
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(shard.identify(), 0.2)
+
+        return session.connects
+
+    assert asyncio.run(main()) == 0
+
+
+def test_project_boot() -> None:
+    assert project_boot([0, 1, 2, 3], 1) == 15
+    assert project_boot([0, 1, 2, 3], 2) == 5
+
+    budget = SessionBudget(1000, 3, 100.0, reserve=1)
+    # two shards go right away, the others wait on the reset
+    assert 99 < project_boot([0, 1, 2, 3], 4, budget=budget) <= 105
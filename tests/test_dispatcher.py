@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import asyncio
+
+from discord.gateway.dispatcher import Dispatcher, DispatchPolicy
+from discord.gateway.metrics import ShardMetrics
+
+
+def test_block_times_out_into_a_drop() -> None:
+    async def main() -> tuple[Dispatcher, ShardMetrics]:
+        async def handler(type: str, data: object) -> None:
+            pass
+
+        metrics = ShardMetrics()
+        # never started, so nothing ever makes room
+        policy = DispatchPolicy(workers=1, queue_size=1, overflow='block', block_timeout=0.05)
+        dispatcher = Dispatcher(handler, policy, metrics)
+
+        await dispatcher.put('MESSAGE_CREATE', {})
+        await dispatcher.put('MESSAGE_CREATE', {})
+        return dispatcher, metrics
+
+    dispatcher, metrics = asyncio.run(main())
+
+    assert metrics.dropped_events['MESSAGE_CREATE'] == 1
+    assert dispatcher.stalls == 1
+    assert not dispatcher.blocking
+    assert dispatcher.pending == 1
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import random
+import struct
+import zlib
+
+import pytest
+
+from discord.gateway import etf
+
+
+@pytest.mark.parametrize(
+    'value',
+    [
+        0,
+        255,
+        256,
+        -1,
+        2**31 - 1,
+        -(2**31),
+        2**31,
+        -(2**31) - 1,
+        175928847299117063,
+        -(2**64),
+        2**2100,
+        1.5,
+        -0.25,
+    ],
+)
+def test_number_round_trip(value: int | float) -> None:
+    assert etf.loads(etf.dumps(value)) == value
+
+
+def test_integer_encodings() -> None:
+    assert etf.dumps(7) == bytes([131, etf.SMALL_INTEGER_EXT, 7])
+    assert etf.dumps(-7) == bytes([131, etf.INTEGER_EXT]) + struct.pack('>i', -7)
+    # snowflakes don't fit an INTEGER_EXT
+    assert etf.dumps(175928847299117063) == bytes([131, etf.SMALL_BIG_EXT, 8, 0]) + (175928847299117063).to_bytes(
+        8, 'little'
+    )
+    assert etf.dumps(2**2100)[1] == etf.LARGE_BIG_EXT
+
+
+def test_atoms() -> None:
+    assert etf.dumps(None) == b'\x83w\x03nil'
+    assert etf.loads(b'\x83w\x03nil') is None
+    assert etf.loads(b'\x83w\x04true') is True
+    assert etf.loads(b'\x83w\x05false') is False
+    # as term_to_binary writes them
+    assert etf.loads(b'\x83d\x00\x04true') is True
+    assert etf.loads(b'\x83s\x05false') is False
+    assert etf.loads(b'\x83d\x00\x07guild_a') == 'guild_a'
+
+
+def test_binaries_and_strings() -> None:
+    assert etf.dumps('hé') == bytes([131, etf.BINARY_EXT]) + struct.pack('>I', 3) + 'hé'.encode()
+    assert etf.loads(etf.dumps('hé')) == 'hé'
+    assert etf.loads(etf.dumps(b'raw')) == 'raw'
+    # a STRING_EXT is a list of bytes, as Erlang sends short lists of small integers
+    assert etf.loads(b'\x83k\x00\x03abc') == 'abc'
+
+
+def test_nested_round_trip() -> None:
+    payload = {
+        'op': 0,
+        's': 42,
+        't': 'GUILD_CREATE',
+        'd': {
+            'id': 175928847299117063,
+            'name': 'guild',
+            'unavailable': False,
+            'icon': None,
+            'roles': [{'id': 1, 'permissions': '104324673', 'tags': {}}],
+            'channels': [],
+            'members': [{'user': {'id': 2**60, 'username': 'a'}, 'roles': [1, 2, 3], 'nick': None}],
+        },
+    }
+
+    assert etf.loads(etf.dumps(payload)) == payload
+
+
+def test_tuples_and_improper_lists() -> None:
+    assert etf.loads(b'\x83h\x02a\x01a\x02') == (1, 2)
+    assert etf.loads(b'\x83i\x00\x00\x00\x01a\x01') == (1,)
+    assert etf.loads(b'\x83l\x00\x00\x00\x01a\x01a\x02') == [1, 2]
+
+
+def test_compressed_term() -> None:
+    inner = etf.dumps({'members': [{'id': i, 'name': 'member'} for i in range(500)]})[1:]
+    compressed = bytes([131, etf.COMPRESSED]) + struct.pack('>I', len(inner)) + zlib.compress(inner)
+
+    assert len(compressed) < len(inner)
+    assert etf.loads(compressed) == etf.loads(bytes([131]) + inner)
+
+
+@pytest.mark.parametrize(
+    'data',
+    [
+        b'',
+        b'\x82a\x01',
+        b'\x83',
+        b'\x83\xff',
+        b'\x83m\x00\x00\x00\x10short',
+        b'\x83n\x08\x00\x01\x02',
+        b'\x83l\x00\x00\x00\x02a\x01',
+        b'\x83t\x00\x00\x00\x01',
+        b'\x83P\x00\x00\x00\x10not zlib',
+        b'\x83P\x00\x00\x00\x10' + zlib.compress(b'a\x01'),
+        b'\x83m\x00\x00\x00\x02\xff\xfe',
+        # a list as a map key
+        b'\x83t\x00\x00\x00\x01l\x00\x00\x00\x01a\x01ja\x01',
+    ],
+)
+def test_bad_input_raises_value_error(data: bytes) -> None:
+    with pytest.raises(ValueError):
+        etf.loads(data)
+
+
+def test_truncated_payloads_raise_value_error() -> None:
+    data = etf.dumps({'d': {'id': 2**60, 'name': 'guild', 'roles': [1, 2, 3], 'ratio': 0.5, 'icon': None}})
+
+    for end in range(len(data)):
+        with pytest.raises(ValueError):
+            etf.loads(data[:end])
+
+
+def test_garbage_only_raises_value_error() -> None:
+    rng = random.Random(8)
+
+    for _ in range(2000):
+        data = bytes([131]) + rng.randbytes(rng.randrange(1, 40))
+
+        try:
+            etf.loads(data)
+        except ValueError:
+            pass
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import logging
+
+import pytest
+
+from discord import GatewayApp, Intents
+from discord.events.base import GatewayEvent
+from discord.internal.subscriptor import Subscription
+
+
+def test_for_events() -> None:
+    assert Intents.for_events([]).as_bit == 0
+    assert Intents.for_events(['READY', 'INTERACTION_CREATE']).as_bit == 0
+    assert Intents.for_events(['GUILD_MEMBER_ADD']).as_bit == Intents.guild_members
+    # sent for guilds and direct messages alike
+    assert Intents.for_events(['MESSAGE_CREATE']).as_bit == Intents.guild_messages | Intents.direct_messages
+    assert Intents.for_events(['TYPING_START', 'GUILD_CREATE']).as_bit == (
+        Intents.guild_message_typing | Intents.direct_message_typing | Intents.guilds
+    )
+
+
+def test_undeliverable() -> None:
+    events = ['MESSAGE_CREATE', 'GUILD_MEMBER_ADD', 'READY']
+
+    assert Intents.undeliverable(events, Intents.guild_messages) == {'GUILD_MEMBER_ADD'}
+    assert Intents.undeliverable(events, Intents.direct_messages | Intents.guild_members) == set()
+    assert Intents.undeliverable(events, 0) == {'MESSAGE_CREATE', 'GUILD_MEMBER_ADD'}
+
+
+def _app_subscribed_to(intents: int, type: str) -> GatewayApp:
+    app = GatewayApp(intents)
+
+    async def callback(event: GatewayEvent) -> None:
+        ...
+
+    app._state.subscriptor.add_subscription(Subscription(GatewayEvent, type=type, callback=callback))
+    return app
+
+
+def test_no_warning_when_one_delivering_intent_is_enabled(caplog: pytest.LogCaptureFixture) -> None:
+    app = _app_subscribed_to(Intents.guild_messages, 'on_message_create')
+
+    with caplog.at_level(logging.WARNING, logger='discord.apps.gateway'):
+        app._warn_undeliverable()
+
+    assert not caplog.records
+
+
+def test_warning_when_no_delivering_intent_is_enabled(caplog: pytest.LogCaptureFixture) -> None:
+    app = _app_subscribed_to(Intents.guilds, 'on_message_create')
+
+    with caplog.at_level(logging.WARNING, logger='discord.apps.gateway'):
+        app._warn_undeliverable()
+
+    assert len(caplog.records) == 1
+    assert 'MESSAGE_CREATE' in caplog.records[0].getMessage()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import asyncio
+from typing import Any
+
+from discord.api import HTTPClient, Route
+
+
+class _Response:
+    content_type = 'application/json'
+
+    def __init__(self, status: int, body: bytes, headers: dict[str, str]) -> None:
+        self.status = status
+        self.headers = headers
+        self._body = body
+
+    async def read(self) -> bytes:
+        return self._body
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.limited = False
+
+    async def request(self, method: str, endpoint: str, **kwargs: Any) -> _Response:
+        await asyncio.sleep(0)
+
+        if not self.limited:
+            self.limited = True
+            return _Response(429, b'{"retry_after": 0.2, "global": true}', {'X-RateLimit-Scope': 'global'})
+
+        return _Response(200, b'{}', {})
+
+    async def close(self) -> None:
+        ...
+
+
+def test_global_rate_limit_releases_everyone_after_retry_after() -> None:
+    async def main() -> list[float]:
+        client = HTTPClient('token', global_rate_limit=1000)
+        client._session = _Session()  # type: ignore[assignment]
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        finished: list[float] = []
+
+        async def request(i: int) -> None:
+            await client.request('GET', Route('/channels/{channel_id}', channel_id=i))
+            finished.append(loop.time() - started)
+
+        await asyncio.gather(*(request(i) for i in range(50)))
+        return finished
+
+    finished = asyncio.run(main())
+
+    assert len(finished) == 50
+    # everything waits out the one retry_after, rather than trickling through in batches after it
+    assert max(finished) < 0.4
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+from discord.gateway.metrics import Histogram, ShardMetrics, render_prometheus
+
+
+def test_histogram_is_cumulative() -> None:
+    histogram = Histogram((0.1, 0.5, 1.0))
+
+    for value in (0.05, 0.1, 0.3, 0.7, 0.9, 3.0):
+        histogram.observe(value)
+
+    # a value on a bound counts towards that bound, as le means less than or equal
+    assert histogram.cumulative() == [('0.1', 2), ('0.5', 3), ('1.0', 5), ('+Inf', 6)]
+    assert histogram.count == 6
+    assert abs(histogram.sum - 5.05) < 1e-9
+
+
+def test_render_prometheus() -> None:
+    metrics = ShardMetrics()
+    metrics.latency = 0.04
+    metrics.heartbeat_latency.observe(0.04)
+    metrics.heartbeat_latency.observe(0.2)
+    metrics.events['MESSAGE_CREATE'] += 3
+    metrics.events['WEIRD"\\\n'] += 1
+    metrics.dropped_events['TYPING_START'] += 2
+    metrics.close_codes[4000] += 1
+    metrics.bytes_compressed = 10
+    metrics.bytes_decompressed = 40
+
+    text = render_prometheus([(0, metrics), (1, ShardMetrics())])
+    lines = text.splitlines()
+
+    assert text.endswith('\n')
+    assert '# TYPE discord_shard_heartbeat_latency_seconds histogram' in lines
+    assert 'discord_shard_latency{shard="0"} 0.04' in lines
+    assert not any(line.startswith('discord_shard_latency{shard="1"}') for line in lines)
+
+    buckets = [line for line in lines if line.startswith('discord_shard_heartbeat_latency_seconds_bucket{shard="0"')]
+    counts = [int(line.rsplit(' ', 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert buckets[-1] == 'discord_shard_heartbeat_latency_seconds_bucket{shard="0",le="+Inf"} 2'
+    assert 'discord_shard_heartbeat_latency_seconds_bucket{shard="0",le="0.05"} 1' in lines
+    assert 'discord_shard_heartbeat_latency_seconds_count{shard="0"} 2' in lines
+    assert any(line.startswith('discord_shard_heartbeat_latency_seconds_sum{shard="0"} 0.24') for line in lines)
+    assert 'discord_shard_heartbeat_latency_seconds_count{shard="1"} 0' in lines
+
+    assert 'discord_shard_events_total{shard="0",type="MESSAGE_CREATE"} 3' in lines
+    assert 'discord_shard_events_total{shard="0",type="WEIRD\\"\\\\\\n"} 1' in lines
+    assert 'discord_shard_dropped_events_total{shard="0",type="TYPING_START"} 2' in lines
+    assert 'discord_shard_closes_total{shard="0",code="4000"} 1' in lines
+    assert 'discord_shard_received_bytes_total{shard="0",stage="decompressed"} 40' in lines
+
+    # every sample belongs to the family announced before it
+    family = None
+    for line in lines:
+        if line.startswith('# TYPE '):
+            family = line.split()[2]
+        elif not line.startswith('#'):
+            assert family is not None and line.startswith(family)
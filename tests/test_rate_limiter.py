@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import asyncio
+
+from discord.api.rate_limiter import Bucket, Executer, RateLimiter, SlidingWindow
+from discord.api.route import Route
+
+
+def _most_in_any_window(times: list[float], per: float) -> int:
+    times = sorted(times)
+    return max(sum(1 for other in times if time <= other < time + per) for time in times)
+
+
+def test_sliding_window_never_exceeds_rate() -> None:
+    async def main() -> tuple[list[float], float]:
+        window = SlidingWindow(50, per=0.2)
+        loop = asyncio.get_running_loop()
+        times: list[float] = []
+
+        async def request() -> None:
+            await window.acquire()
+            times.append(loop.time())
+
+        started = loop.time()
+        await asyncio.gather(*(request() for _ in range(150)))
+        return times, started
+
+    times, started = asyncio.run(main())
+
+    # a full window's burst doesn't stack on top of the next one
+    assert sum(1 for time in times if time - started < 0.2) == 50
+    # times are taken after acquire returns, so allow for scheduling delay
+    assert _most_in_any_window(times, 0.19) <= 50
+
+
+def test_sliding_window_lock() -> None:
+    async def main() -> float:
+        window = SlidingWindow(50, per=1.0)
+        loop = asyncio.get_running_loop()
+        window.lock(0.1)
+        started = loop.time()
+        await window.acquire()
+        return loop.time() - started
+
+    assert asyncio.run(main()) >= 0.1
+
+
+def test_undiscovered_bucket_sends_one_request() -> None:
+    async def main() -> list[int]:
+        limiter = RateLimiter()
+        route = Route('/guilds/{guild_id}/channels', guild_id=1)
+        bucket = limiter.get_bucket('POST', route)
+        done: list[int] = []
+
+        async def request(n: int) -> None:
+            await limiter.get_bucket('POST', route).acquire()
+            done.append(n)
+
+        tasks = [asyncio.create_task(request(n)) for n in range(50)]
+        await asyncio.sleep(0.05)
+        sent = [len(done)]
+
+        # the first response tells the bucket its limits
+        limiter.update(
+            'POST',
+            route,
+            {
+                'X-RateLimit-Bucket': 'abc',
+                'X-RateLimit-Limit': '5',
+                'X-RateLimit-Remaining': '4',
+                'X-RateLimit-Reset-After': '0.2',
+            },
+        )
+        await asyncio.sleep(0.05)
+        sent.append(len(done))
+
+        # the bucket moved to its hash, and kept its waiters
+        assert limiter.get_bucket('POST', route) is bucket
+
+        for task in tasks:
+            task.cancel()
+        return sent
+
+    assert asyncio.run(main()) == [1, 5]
+
+
+def test_bucket_without_headers_is_unlimited() -> None:
+    async def main() -> None:
+        limiter = RateLimiter()
+        route = Route('/users/@me')
+        await limiter.get_bucket('GET', route).acquire()
+        limiter.update('GET', route, {})
+        await asyncio.wait_for(asyncio.gather(*(limiter.get_bucket('GET', route).acquire() for _ in range(20))), 1)
+
+    asyncio.run(main())
+
+
+def test_idle_buckets_are_dropped() -> None:
+    async def main() -> tuple[int, bool]:
+        limiter = RateLimiter(sweep_interval=0.0)
+        headers = {
+            'X-RateLimit-Bucket': 'abc',
+            'X-RateLimit-Limit': '1',
+            'X-RateLimit-Remaining': '0',
+            'X-RateLimit-Reset-After': '0.05',
+        }
+
+        for channel_id in range(100):
+            route = Route('/channels/{channel_id}/messages', channel_id=channel_id)
+            await limiter.get_bucket('POST', route).acquire()
+            limiter.update('POST', route, headers)
+
+        # still waited on, so it has to survive the sweep
+        busy = Route('/channels/{channel_id}/messages', channel_id=0)
+        waiter = asyncio.create_task(limiter.get_bucket('POST', busy).acquire())
+        await asyncio.sleep(0)
+        limiter.get_bucket('POST', busy).lock(1.0)
+        await asyncio.sleep(0.1)
+
+        limiter.get_bucket('GET', Route('/users/@me'))
+        kept = len(limiter._buckets)
+        still_there = not waiter.done() and limiter.get_bucket('POST', busy)._waiters
+        waiter.cancel()
+        return kept, bool(still_there)
+
+    kept, still_there = asyncio.run(main())
+
+    assert kept == 2
+    assert still_there
+
+
+def test_bucket_stress() -> None:
+    async def main() -> tuple[list[int], list[float], set[int]]:
+        bucket = Bucket()
+        # start with the window used up, so every request goes through the waiter queue
+        bucket.update(limit=50, remaining=0, reset_after=0.05)
+        loop = asyncio.get_running_loop()
+        order: list[int] = []
+        times: list[float] = []
+
+        async def request(n: int) -> None:
+            await bucket.acquire()
+            order.append(n)
+            times.append(loop.time())
+
+        tasks = [asyncio.create_task(request(n)) for n in range(5000)]
+        await asyncio.sleep(0)
+
+        cancelled = set(range(3, 5000, 7))
+        for n in cancelled:
+            tasks[n].cancel()
+
+        # none are stranded, everything left completes
+        await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 30)
+        return order, times, cancelled
+
+    order, times, cancelled = asyncio.run(main())
+
+    assert order == [n for n in range(5000) if n not in cancelled]
+    # times are taken after the waiter wakes up, so allow for scheduling delay
+    assert _most_in_any_window(times, 0.04) <= 50
+
+
+def test_executer_serves_late_arrivals() -> None:
+    async def main() -> list[int]:
+        executer = Executer(route=Route('/'))
+        done: list[int] = []
+
+        async def request(n: int) -> None:
+            await executer.wait()
+            done.append(n)
+
+        executed = asyncio.create_task(executer.executed(reset_after=0.05, limit=10, is_global=True))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(request(n)) for n in range(30)]
+
+        await executed
+        # arrive after the first release, while the executer is still draining
+        tasks += [asyncio.create_task(request(n)) for n in range(30, 45)]
+
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+        return done
+
+    assert asyncio.run(main()) == list(range(45))
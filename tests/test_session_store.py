@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+import asyncio
+import os
+from typing import Any
+
+import pytest
+
+from discord import GatewayApp, StorePolicy
+from discord.cache.core import STORES
+from discord.gateway.shard import Shard
+from discord.gateway.store import FileSessionStore, SessionInfo, SessionStore, SQLiteSessionStore
+
+USER = {'id': '175928847299117063', 'username': 'bot', 'discriminator': '0', 'avatar': None}
+SESSION = SessionInfo('abc', 42, 'wss://gateway-us-east1-b.discord.gg', USER)
+
+
+@pytest.fixture(params=['file', 'sqlite'])
+def store(request: pytest.FixtureRequest, tmp_path: Any) -> SessionStore:
+    if request.param == 'file':
+        return FileSessionStore(str(tmp_path / 'sessions'))
+    return SQLiteSessionStore(str(tmp_path / 'sessions.db'))
+
+
+def test_round_trip(store: SessionStore) -> None:
+    assert store.load(0) is None
+
+    store.save(0, SESSION)
+    store.save(1, SessionInfo('def', None, 'wss://gateway.discord.gg'))
+    store.save(0, SESSION)
+
+    assert store.load(0) == SESSION
+    assert store.load(1) == SessionInfo('def', None, 'wss://gateway.discord.gg')
+
+    store.delete(0)
+    store.delete(0)
+
+    assert store.load(0) is None
+    assert store.load(1) is not None
+
+
+def test_torn_file_is_ignored(tmp_path: Any) -> None:
+    store = FileSessionStore(str(tmp_path))
+
+    with open(os.path.join(tmp_path, 'shard-0.json'), 'w') as f:
+        f.write('{"session_id": "ab')
+
+    assert store.load(0) is None
+
+
+class _WebSocket:
+    closed = False
+    close_code = None
+
+    def __aiter__(self) -> '_WebSocket':
+        return self
+
+    async def __anext__(self) -> Any:
+        raise StopAsyncIteration
+
+
+class _Session:
+    def __init__(self) -> None:
+        self.urls: list[str] = []
+
+    async def ws_connect(self, url: str, **kwargs: Any) -> _WebSocket:
+        self.urls.append(url)
+        return _WebSocket()
+
+
+def _start(store: SessionStore, cache_policies: dict[str, StorePolicy] | None) -> tuple[Shard, list[int]]:
+    async def main() -> tuple[Shard, list[int]]:
+        app = GatewayApp(0, cache_policies=cache_policies)
+        app._state.loop_activated()
+        shard = Shard('token', 0, 1, _Session(), app._state, session_store=store)  # type: ignore[arg-type]
+        sent: list[int] = []
+
+        async def send(data: dict[str, Any]) -> None:
+            sent.append(data['op'])
+
+        shard.send = send  # type: ignore[method-assign]
+        await shard.start()
+        await shard._dispatcher.close()
+        return shard, sent
+
+    return asyncio.run(main())
+
+
+NO_CACHE = {name: StorePolicy(enabled=False) for name in STORES}
+
+
+def test_restore_resumes_without_cache(store: SessionStore) -> None:
+    store.save(0, SESSION)
+    shard, sent = _start(store, NO_CACHE)
+
+    assert sent == [6]
+    assert shard._session_id == 'abc'
+    assert shard._sequence == 42
+    assert shard._state.user.id is not None
+    assert shard._state.user_ready == USER
+    # only ever tried once
+    assert store.load(0) is None
+
+
+def test_restore_identifies_when_caching(store: SessionStore) -> None:
+    store.save(0, SESSION)
+    shard, sent = _start(store, None)
+
+    assert sent == [2]
+    assert shard._session_id is None
+    assert store.load(0) is None
+
+
+def test_restore_identifies_without_a_saved_user(store: SessionStore) -> None:
+    store.save(0, SessionInfo('abc', 42, 'wss://gateway.discord.gg'))
+    shard, sent = _start(store, NO_CACHE)
+
+    assert sent == [2]
+    assert shard._session_id is None
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# cython: language_level=3
+# Copyright (c) 2021-present VincentRPS
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+from discord.apps.gateway import GatewayApp
+from discord.events.base import GatewayEvent
+from discord.internal.subscriptor import Subscription
+
+
+async def _callback(event: GatewayEvent) -> None:
+    ...
+
+
+def test_wanted_events_follow_subscriptions() -> None:
+    app = GatewayApp(0)
+    subscriptor = app._state.subscriptor
+    first = Subscription(GatewayEvent, type='on_typing_start', callback=_callback)
+    second = Subscription(GatewayEvent, type='on_typing_start', callback=_callback)
+
+    subscriptor.add_subscription(first)
+    subscriptor.add_subscription(second)
+    assert 'TYPING_START' in app._state.wanted_events
+
+    # still wanted while one subscription is left
+    subscriptor.remove_subscription(first)
+    assert 'TYPING_START' in app._state.wanted_events
+
+    subscriptor.remove_subscription(second)
+    assert 'TYPING_START' not in app._state.wanted_events
+    assert subscriptor.events == frozenset()